@@ -0,0 +1,153 @@
+"""
+Benchmarks of aggregations in orangecontrib.timeseries.aggregate.
+
+For every aggregation in AggOptions, the script measures the time and peak
+memory of its sliding transform and of block aggregation (sequential blocks
+of the window's width, as in Moving Transform) over data of different sizes,
+window widths, shifts (1 and the window's width) and proportions of missing
+values. Run
+
+    python benchmark/bench_aggregate.py
+
+with the add-on installed (e.g. `pip install -e .`) for the full suite, or
+add --quick for smaller sizes. Results can be saved with --save and compared
+with a previous run with --compare.
+
+Cases whose time is expected to exceed --max-time (extrapolated from the
+smaller size) are skipped.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+from orangecontrib.timeseries.aggregate import \
+    AggOptions, aggregate_groups, group_offsets, set_backend
+
+
+SIZES = (10 ** 3, 10 ** 5, 10 ** 7)
+QUICK_SIZES = (10 ** 3, 10 ** 5)
+WIDTHS = (5, 50, 500)
+NAN_RATIOS = (0, 0.05, 0.5)
+
+
+def make_data(n, nan_ratio, seed=42):
+    rgen = np.random.default_rng(seed)
+    x = np.abs(rgen.normal(size=n)) + 0.1  # harmonic and geometric means
+    x[rgen.random(n) < nan_ratio] = np.nan
+    return x
+
+
+def block_aggregation(agg, x, width):
+    indices = np.arange(len(x)) // width
+    order, offsets = group_offsets(indices, indices[-1] + 1)
+    return aggregate_groups(x, order, offsets, agg)
+
+
+def measure(func, repeat):
+    # Best time of `repeat` runs after a warm-up run (which also compiles
+    # numba kernels), and peak memory in a separate run, since tracing
+    # allocations slows them down
+    func()
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def cases(aggregations):
+    for name in aggregations:
+        agg = AggOptions[name]
+        for width in WIDTHS:
+            for shift in sorted({1, width}):
+                for nan_ratio in NAN_RATIOS:
+                    yield (name, "sliding", width, shift, nan_ratio), \
+                        partial(agg.transform, width=width, shift=shift)
+                    if agg.block_transform is not None and shift == width:
+                        yield (name, "block", width, shift, nan_ratio), \
+                            partial(block_aggregation, agg, width=width)
+
+
+def run(aggregations, sizes, repeat, max_time):
+    # Yields keys and results; result is None for skipped cases
+    data = {}
+    for (name, kind, width, shift, nan_ratio), func in cases(aggregations):
+        last = None
+        for n in sizes:
+            key = f"{name}|{kind}|{n}|{width}|{shift}|{nan_ratio}"
+            if width > n:
+                continue
+            # assume n log n time complexity
+            if last is not None and last[1] * n * np.log(n) \
+                    / (last[0] * np.log(last[0])) > max_time:
+                yield key, None
+                continue
+            if (n, nan_ratio) not in data:
+                data[n, nan_ratio] = make_data(n, nan_ratio)
+            elapsed, peak = measure(partial(func, data[n, nan_ratio]), repeat)
+            last = n, elapsed
+            yield key, {"time": elapsed, "memory": peak}
+
+
+def format_row(key, result, previous):
+    name, kind, n, width, shift, nan_ratio = key.split("|")
+    row = f"{name:>10} {kind:>8} {n:>9} {width:>4} {shift:>4} " \
+          f"{float(nan_ratio):>5.2f} "
+    if result is None:
+        return row + f"{'skipped':>11}"
+    row += f"{result['time'] * 1000:>11.3f} {result['memory'] / 2 ** 20:>9.1f}"
+    if previous is not None and previous.get(key):
+        row += f" {result['time'] / previous[key]['time']:>7.2f}"
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--quick", action="store_true",
+                        help=f"use sizes {QUICK_SIZES} instead of {SIZES}")
+    parser.add_argument("--agg", nargs="+", choices=list(AggOptions),
+                        default=list(AggOptions), metavar="NAME",
+                        help="aggregations to benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of timed runs; the best is reported")
+    parser.add_argument("--max-time", type=float, default=60,
+                        help="skip cases expected to run longer (seconds)")
+    parser.add_argument("--backend", choices=("numpy", "numba"),
+                        default="numpy",
+                        help="kernels for quantiles and modes")
+    parser.add_argument("--save", metavar="FILE",
+                        help="save results to a json file")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="show ratios of times to those in a json file")
+    args = parser.parse_args()
+    set_backend(args.backend)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    header = f"{'agg':>10} {'kind':>8} {'n':>9} {'w':>4} {'sh':>4} " \
+             f"{'nans':>5} {'time [ms]':>11} {'mem [MB]':>9}"
+    print(header + (f" {'ratio':>7}" if previous else ""))
+    results = {}
+    sizes = QUICK_SIZES if args.quick else SIZES
+    for key, result in run(args.agg, sizes, args.repeat, args.max_time):
+        print(format_row(key, result, previous), flush=True)
+        if result is not None:
+            results[key] = result
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
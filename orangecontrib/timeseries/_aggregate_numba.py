@@ -0,0 +1,99 @@
+# Compiled kernels for quantiles and modes, which are loop-bound in NumPy.
+# Importing this module requires numba; aggregate.py imports it when the
+# backend is set to "numba".
+# Kernels take 1d float arrays; windows must not be empty.
+import numba
+import numpy as np
+
+
+@numba.njit(cache=True)
+def _insert(window, size, value):
+    # Insert value into sorted window[:size]
+    pos = np.searchsorted(window[:size], value)
+    window[pos + 1:size + 1] = window[pos:size].copy()
+    window[pos] = value
+
+
+@numba.njit(cache=True)
+def _remove(window, size, value):
+    # Remove value from sorted window[:size]
+    pos = np.searchsorted(window[:size], value)
+    window[pos:size - 1] = window[pos + 1:size].copy()
+
+
+@numba.njit(cache=True)
+def _quantile(window, size, q):
+    # Linear interpolation between the closest ranks, as in moving_quantile
+    pos = q * (size - 1)
+    lo = int(pos)
+    value = window[lo]
+    if pos > lo:
+        value += (window[lo + 1] - value) * (pos - lo)
+    return value
+
+
+@numba.njit(cache=True)
+def _mode(window, size):
+    # The most frequent value in sorted window[:size]; the smallest on ties
+    best, best_count = window[0], 0
+    start = 0
+    for i in range(1, size + 1):
+        if i == size or window[i] != window[start]:
+            if i - start > best_count:
+                best, best_count = window[start], i - start
+            start = i
+    return best
+
+
+@numba.njit(cache=True)
+def _moving_sorted(x, width, shift, q, mode):
+    # Keep a sorted window of defined values and compute quantile or mode
+    n = len(x)
+    res = np.full(1 + (n - width) // shift, np.nan)
+    window = np.empty(width + 1)  # a value is inserted before removing
+    size = 0
+    for i in range(n):
+        if not np.isnan(x[i]):
+            _insert(window, size, x[i])
+            size += 1
+        if i >= width and not np.isnan(x[i - width]):
+            _remove(window, size, x[i - width])
+            size -= 1
+        start = i - width + 1
+        if start < 0 or start % shift or not size:
+            continue
+        res[start // shift] = \
+            _mode(window, size) if mode else _quantile(window, size, q)
+    return res
+
+
+@numba.njit(cache=True)
+def moving_quantile(x, width, shift, q):
+    return _moving_sorted(x, width, shift, q, False)
+
+
+@numba.njit(cache=True)
+def moving_mode(x, width, shift):
+    return _moving_sorted(x, width, shift, 0., True)
+
+
+@numba.njit(cache=True)
+def _range_sorted(x, starts, ends, q, mode):
+    res = np.full(len(starts), np.nan)
+    for i in range(len(starts)):
+        window = x[starts[i]:ends[i]]
+        window = np.sort(window[~np.isnan(window)])
+        if len(window):
+            res[i] = _mode(window, len(window)) if mode \
+                else _quantile(window, len(window), q)
+    return res
+
+
+@numba.njit(cache=True)
+def range_quantile(x, starts, ends, q):
+    return _range_sorted(x, starts, ends, q, False)
+
+
+@numba.njit(cache=True)
+def range_mode(x, starts, ends):
+    return _range_sorted(x, starts, ends, 0., True)
@@ -1,23 +1,71 @@
 import dataclasses
-from datetime import date
+import os
+from bisect import bisect_left, insort
 import calendar
+from concurrent.futures import ThreadPoolExecutor
+from math import comb
 from typing import Dict, Callable, Optional, Sequence, Union
 
-from functools import partial
+from functools import partial, wraps
+from importlib import import_module
 
 import numpy as np
-from scipy import stats
+from scipy import signal, stats
 from Orange.data import DiscreteVariable, ContinuousVariable
-from Orange.util import utc_from_timestamp
 
-from orangecontrib.timeseries import Timeseries, truncated_date
+from orangecontrib.timeseries import Timeseries
+
+
+# All sliding aggregations accept either a 1d array or a 2d array with
+# columns in which case they aggregate along axis 0 (for each column)
+
+
+# Kernels are vectorized with NumPy, except for quantiles and modes over
+# sliding windows and ranges, which loop over rows. With backend "numba",
+# these loops run as compiled kernels from _aggregate_numba; the backend is
+# opt-in, and numba is imported only when it is set.
+_backend = "numpy"
+_aggregate_numba = None
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(name):
+    global _backend, _aggregate_numba
+    if name not in ("numpy", "numba"):
+        raise ValueError(f"unknown backend '{name}'")
+    if name == "numba" and _aggregate_numba is None:
+        try:
+            _aggregate_numba = \
+                import_module("orangecontrib.timeseries._aggregate_numba")
+        except ImportError:
+            raise ValueError("backend 'numba' requires numba") from None
+    _backend = name
+
+
+def _nwindows(x, width, shift):
+    return 0 if width > len(x) else 1 + (len(x) - width) // shift
+
+
+def _by_columns(func):
+    # Decorator for kernels that can only process 1d arrays
+    @wraps(func)
+    def wrapper(x, width, shift=1, *args, **kwargs):
+        if x.ndim == 1:
+            return func(x, width, shift, *args, **kwargs)
+        res = np.empty((_nwindows(x, width, shift), x.shape[1]))
+        for i, column in enumerate(x.T):
+            res[:, i] = func(column, width, shift, *args, **kwargs)
+        return res
+    return wrapper
 
 
 def moving_sum(x, width, shift=1):
-    s = np.nancumsum(x)
-    return np.hstack((s[width - 1:width] - 0,
-                      s[shift + width - 1::shift]
-                      - s[shift - 1:-width:shift]))
+    if width > len(x):
+        return np.empty((0, ) + x.shape[1:])
+    return _window_sum(x, *_moving_ranges(x, width, shift), width)
 
 
 def moving_count_nonzero(x, width, shift=1):
@@ -28,13 +76,204 @@ def moving_count_defined(x, width, shift=1):
     return moving_sum(np.isfinite(x), width, shift)
 
 
+def _block_sums(values, starts, ends, block):
+    # Sums of values over ranges starts[i]:ends[i] of at most `block` rows,
+    # accumulated within blocks of `block` rows, like in _moving_extreme:
+    # each range is a part of one block and, possibly, a prefix of the next.
+    # Sums over the two parts are returned separately.
+    n = len(values)
+    nblocks = max(-(-n // block), 1)
+    padded = np.zeros((nblocks * block, ) + values.shape[1:])
+    padded[:n] = values
+    blocks = padded.reshape((nblocks, block) + values.shape[1:])
+    left = np.cumsum(blocks, axis=1).reshape(padded.shape)
+    right = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    block_ends = (starts // block + 1) * block
+    shape = (-1, ) + (1, ) * (values.ndim - 1)
+    last = len(padded) - 1
+    first = right[np.minimum(starts, last)] - np.where(
+        (ends < block_ends).reshape(shape), right[np.minimum(ends, last)], 0)
+    second = np.where((ends > block_ends).reshape(shape),
+                      left[np.clip(ends - 1, 0, last)], 0)
+    return first, second
+
+
+def _window_sum(x, starts, ends, block):
+    # Sums over ranges of at most `block` rows. Integer (and boolean) values
+    # are summed exactly with prefix sums. Prefix sums of floats would carry
+    # rounding errors of all previous values, so floats are summed within
+    # blocks, and infinite values are counted separately.
+    if x.dtype.kind in "biu":
+        s = np.cumsum(x, axis=0)
+        s = np.concatenate((np.zeros((1, ) + x.shape[1:], dtype=s.dtype), s))
+        return s[ends] - s[starts]
+    finite = np.isfinite(x)
+    first, second = \
+        _block_sums(np.where(finite, x, 0), starts, ends, block)
+    res = first + second
+    if not np.all(finite | np.isnan(x)):
+        positive = _window_sum(x == np.inf, starts, ends, block) > 0
+        negative = _window_sum(x == -np.inf, starts, ends, block) > 0
+        res[positive] = np.inf
+        res[negative] = -np.inf
+        res[positive & negative] = np.nan
+    return res
+
+
+def _binomial_shift(sums, shift):
+    # Converts sums of powers of y to sums of powers of y + shift
+    return [sum(comb(k, j) * shift ** (k - j) * sums[j]
+                for j in range(k + 1))
+            for k in range(len(sums))]
+
+
+def _power_sums(x, starts, ends, block, order, defined=None):
+    # Counts and sums of powers of deviations up to `order` for ranges of
+    # at most `block` rows. Prefix sums of powers lose precision when values
+    # are far from the center (e.g. with trends), so deviations are taken
+    # from the first defined value of each block and sums are accumulated
+    # within blocks (_block_sums). Both parts of a range are shifted to the
+    # same block's center, which is returned as the center of the range.
+    # Centers and sums depend only on the rows up to the end of the range,
+    # so the results are the same if the data is processed in chunks
+    # aligned to blocks (see MovingAggregator).
+    # Ranges whose variance is small compared to deviations from the centers
+    # (e.g. near jumps) lose precision, too; they are computed directly.
+    if defined is None:
+        defined = ~np.isnan(x)
+    n = len(x)
+    nblocks = max(-(-n // block), 1)
+    padded = np.zeros((nblocks * block, ) + x.shape[1:])
+    padded[:n] = np.where(defined, x, 0)
+    blocks = padded.reshape((nblocks, block) + x.shape[1:])
+    padded_defined = np.zeros(padded.shape, dtype=bool)
+    padded_defined[:n] = defined
+    blocks_defined = padded_defined.reshape(blocks.shape)
+    counts = np.sum(blocks_defined, axis=1)
+    centers = np.take_along_axis(
+        blocks, np.argmax(blocks_defined, axis=1)[:, None], axis=1)[:, 0]
+    with np.errstate(invalid="ignore"):
+        dev = np.where(defined, x - np.repeat(centers, block, axis=0)[:n], 0)
+
+    first_block = np.minimum(starts // block, nblocks - 1)
+    second_block = np.minimum(first_block + 1, nblocks - 1)
+    # shift to the center of the first block, unless it is empty
+    center = np.where(counts[first_block] > 0,
+                      centers[first_block], centers[second_block])
+    power = defined.astype(float)
+    firsts, seconds = [], []
+    for _ in range(order + 1):
+        first, second = _block_sums(power, starts, ends, block)
+        firsts.append(first)
+        seconds.append(second)
+        power = power * dev
+    with np.errstate(invalid="ignore"):
+        first_shift = centers[first_block] - center
+        second_shift = centers[second_block] - center
+        sums = [first + second for first, second in zip(
+            _binomial_shift(firsts, first_shift),
+            _binomial_shift(seconds, second_shift))]
+
+    # The mean squared deviation of values before shifting bounds the
+    # magnitude of terms in sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = (firsts[2] + firsts[0] * first_shift ** 2
+                 + seconds[2] + seconds[0] * second_shift ** 2) / sums[0]
+        var = sums[2] / sums[0] - (sums[1] / sums[0]) ** 2
+        inexact = (sums[0] > 0) & ~((scale == 0) | (var > 1e-4 * scale))
+    if np.any(inexact):
+        rows, cols = np.nonzero(inexact.reshape(len(starts), -1))
+        lengths = (ends - starts)[rows]
+        offsets = np.cumsum(lengths) - lengths
+        indices = np.arange(np.sum(lengths)) \
+            - np.repeat(offsets - starts[rows], lengths)
+        values = x.reshape(n, -1)[indices, np.repeat(cols, lengths)]
+        valid = ~np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            mean = np.add.reduceat(np.where(valid, values, 0), offsets) \
+                / np.add.reduceat(valid, offsets)
+            dev = np.where(valid, values - np.repeat(mean, lengths), 0)
+        center[inexact] = mean
+        power = valid.astype(float)
+        for power_sums in sums:
+            power_sums[inexact] = np.add.reduceat(power, offsets)
+            power = power * dev
+    return center, sums
+
+
+def _moving_ranges(x, width, shift):
+    starts = np.arange(0, len(x) - width + 1, shift)
+    return starts, starts + width
+
+
+def _moments(x, starts, ends, block, defined=None):
+    center, (count, s1, s2) = \
+        _power_sums(x, starts, ends, block, 2, defined)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / count
+        var = np.maximum(s2 / count - mean ** 2, 0)
+    return center + mean, var
+
+
+def _moving_moments(x, width, shift, defined=None):
+    if width > len(x):
+        return (np.empty((0, ) + x.shape[1:]), ) * 2
+    return _moments(x, *_moving_ranges(x, width, shift), width, defined)
+
+
+def moving_mean(x, width, shift=1):
+    return _moving_moments(x, width, shift)[0]
+
+
+def moving_var(x, width, shift=1):
+    return _moving_moments(x, width, shift)[1]
+
+
+def moving_std(x, width, shift=1):
+    return np.sqrt(moving_var(x, width, shift))
+
+
+def _standardized_moment(sums, order):
+    # Skewness (order 3) or excess kurtosis (order 4), biased as in
+    # scipy.stats, from counts and sums of powers of deviations from some
+    # center. Windows with (numerically) zero variance give nan, like in
+    # scipy.stats.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r1, r2, r3, *r4 = (power_sum / sums[0] for power_sum in sums[1:])
+        m2 = r2 - r1 ** 2
+        if order == 3:
+            res = (r3 - 3 * r1 * r2 + 2 * r1 ** 3) / m2 ** 1.5
+        else:
+            res = (r4[0] - 4 * r1 * r3 + 6 * r1 ** 2 * r2 - 3 * r1 ** 4) \
+                / m2 ** 2 - 3
+        res[~(m2 > 1e-12 * r2)] = np.nan
+    return res
+
+
+def _moving_standardized_moment(x, width, shift, order):
+    if width > len(x):
+        return np.empty((0, ) + x.shape[1:])
+    _, sums = _power_sums(x, *_moving_ranges(x, width, shift), width, order)
+    return _standardized_moment(sums, order)
+
+
+def moving_skew(x, width, shift=1):
+    return _moving_standardized_moment(x, width, shift, 3)
+
+
+def moving_kurtosis(x, width, shift=1):
+    return _moving_standardized_moment(x, width, shift, 4)
+
+
 def _windowed(x, width, shift):
-    if width > x.size:
-        return np.empty((0, 1))  # we need a 2d array, but 0 rows
+    # Windows are along axis 1; for 2d x, columns are along axis 2
+    if width > len(x):
+        # we need an array with windows, but 0 rows
+        return np.empty((0, 1) + x.shape[1:])
     return np.lib.stride_tricks.as_strided(
         x,
-        shape=(1 + (x.size - width) // shift, width),
-        strides=(shift * x.strides[0], x.strides[0])
+        shape=(_nwindows(x, width, shift), width) + x.shape[1:],
+        strides=(shift * x.strides[0], ) + x.strides
     )
 
 
@@ -42,34 +281,223 @@ def windowed_func(func, x, width, shift):
     return func(_windowed(x, width, shift), axis=1)
 
 
+def _moving_extreme(x, width, shift, ufunc, fill, nans=None, count=None):
+    # van Herk / Gil-Werman: split x into blocks of `width`, accumulate the
+    # extreme within each block from the left and from the right; every
+    # window then spans at most two blocks and is the extreme of the right
+    # accumulation at its start and the left accumulation at its end.
+    # The cost is independent of width.
+    n = len(x)
+    if width > n:
+        return np.empty((0, ) + x.shape[1:])
+    if nans is None:
+        nans = np.isnan(x)
+    if count is None:
+        count = moving_sum(~nans, width, shift)
+    nblocks = -(-n // width)
+    padded = np.full((nblocks * width, ) + x.shape[1:], fill)
+    padded[:n] = np.where(nans, fill, x)
+    blocks = padded.reshape((nblocks, width) + x.shape[1:])
+    left = ufunc.accumulate(blocks, axis=1).reshape(padded.shape)
+    right = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1] \
+        .reshape(padded.shape)
+    res = ufunc(right[:n - width + 1:shift], left[width - 1:n:shift])
+    res[count == 0] = np.nan
+    return res
+
+
+def moving_min(x, width, shift=1):
+    return _moving_extreme(x, width, shift, np.minimum, np.inf)
+
+
+def moving_max(x, width, shift=1):
+    return _moving_extreme(x, width, shift, np.maximum, -np.inf)
+
+
 def windowed_span(x, width, shift):
+    return moving_max(x, width, shift) - moving_min(x, width, shift)
+
+
+MOVING_STATISTICS = ("defined", "sum", "mean", "var", "std", "min", "max",
+                     "span")
+
+
+def _window_statistics(x, statistics, window_sum, window_extreme, moments):
+    # Computes any subset of MOVING_STATISTICS at once for windows given by
+    # the functions that compute their sums, extremes and moments. The mask
+    # of missing values and window counts, the sums of moments and the
+    # extremes are computed once and shared; results equal those of
+    # separate functions
+    nans = np.isnan(x)
+    count = window_sum(~nans)
+    res = {}
+    if "defined" in statistics:
+        infs = np.isinf(x)
+        res["defined"] = count - window_sum(infs) if infs.any() else count
+    if "sum" in statistics:
+        res["sum"] = window_sum(x)
+    if {"mean", "var", "std"} & set(statistics):
+        res["mean"], res["var"] = moments(x, defined=~nans)
+    if "std" in statistics:
+        res["std"] = np.sqrt(res["var"])
+    if {"min", "span"} & set(statistics):
+        res["min"] = window_extreme(
+            x, ufunc=np.minimum, fill=np.inf, nans=nans, count=count)
+    if {"max", "span"} & set(statistics):
+        res["max"] = window_extreme(
+            x, ufunc=np.maximum, fill=-np.inf, nans=nans, count=count)
+    if "span" in statistics:
+        res["span"] = res["max"] - res["min"]
+    return {name: res[name] for name in statistics}
+
+
+def moving_statistics(x, width, shift=1, statistics=MOVING_STATISTICS):
+    return _window_statistics(
+        x, statistics,
+        partial(moving_sum, width=width, shift=shift),
+        partial(_moving_extreme, width=width, shift=shift),
+        partial(_moving_moments, width=width, shift=shift))
+
+
+def _moving_quantile_sorted(x, width, shift, q, chunk_size=2 ** 20):
+    # Sort each window; nans are sorted to the end and excluded. Windows are
+    # processed in chunks to bound the memory for the sorted copies
     windows = _windowed(x, width, shift)
-    return np.nanmax(windows, axis=1) - np.nanmin(windows, axis=1)
+    res = np.empty(len(windows))
+    step = max(1, chunk_size // width)
+    for start in range(0, len(windows), step):
+        chunk = np.sort(windows[start:start + step], axis=1)
+        count = np.sum(~np.isnan(chunk), axis=1)
+        pos = q * (count - 1)
+        lo = np.floor(pos).astype(int)
+        rows = np.arange(len(chunk))
+        values = chunk[rows, np.maximum(lo, 0)]
+        upper = chunk[rows, np.minimum(lo + 1, width - 1)]
+        frac = pos - lo
+        between = frac > 0
+        values[between] += \
+            (upper[between] - values[between]) * frac[between]
+        values[count == 0] = np.nan
+        res[start:start + step] = values
+    return res
+
+
+@_by_columns
+def moving_quantile(x, width, shift=1, q=0.5):
+    # Keep a sorted list of defined values in the current window; inserting
+    # and removing a value is a binary search and a memmove, so the cost
+    # per step is practically independent of the width. Sorting all
+    # windows is faster for narrow windows; the threshold is empirical
+    n = x.size
+    if width > n:
+        return np.empty(0)
+    if _backend == "numba":
+        return _aggregate_numba.moving_quantile(
+            x.astype(float), width, shift, q)
+    if width <= 128:
+        return _moving_quantile_sorted(x, width, shift, q)
+    res = np.full(1 + (n - width) // shift, np.nan)
+    values = x.tolist()
+    window = []
+    for i, value in enumerate(values):
+        if value == value:
+            insort(window, value)
+        if i >= width:
+            old = values[i - width]
+            if old == old:
+                del window[bisect_left(window, old)]
+        start = i - width + 1
+        if start < 0 or start % shift or not window:
+            continue
+        pos = q * (len(window) - 1)
+        lo = int(pos)
+        value = window[lo]
+        if pos > lo:
+            value += (window[lo + 1] - value) * (pos - lo)
+        res[start // shift] = value
+    return res
+
+
+def moving_median(x, width, shift=1):
+    return moving_quantile(x, width, shift, 0.5)
+
+
+def _windowed_dot(x, weights, shift, group_size=2 ** 14, band_size=256):
+    # Weighted sums of windows, sum_j x[s + j] * weights[j], as direct dot
+    # products. Rows are split into blocks of `width` (like in
+    # _moving_extreme); windows that start within a block are computed from
+    # the block and the next one. Windows that start within each part of
+    # `band_size` rows of a block are computed together, by multiplying the
+    # rows they cover with a band matrix of weights.
+    # Unlike with FFT convolution, rounding errors do not spread beyond the
+    # window. Blocks are multiplied in groups of the same size, so sums do
+    # not depend on the rows outside the window either: the results are the
+    # same if the data is processed in chunks aligned to blocks, which is
+    # not possible with FFT, since it mixes all rows of a block. Time is
+    # thus O(n width), but the band takes only O(width band_size) memory.
+    n, width = len(x), len(weights)
+    size = min(width, band_size)
+    offsets = np.arange(size + width - 1)[:, None] - np.arange(size)
+    band = np.where((offsets >= 0) & (offsets < width),
+                    weights[np.clip(offsets, 0, width - 1)], 0)
+    nblocks = (n - width) // width + 1
+    ngroup = max(1, group_size // width)
+    nrows = -(-nblocks // ngroup) * ngroup
+    columns = x.reshape(n, -1).T
+    res = np.empty((nrows, width, len(columns)))
+    for column, column_res in zip(columns, np.moveaxis(res, 2, 0)):
+        padded = np.zeros((nrows + 1) * width)
+        padded[:n] = column
+        pairs = np.lib.stride_tricks.as_strided(
+            padded, shape=(nrows, 2 * width),
+            strides=(width * padded.itemsize, padded.itemsize))
+        for start in range(0, nrows, ngroup):
+            for part in range(0, width, size):
+                nparts = min(size, width - part)
+                column_res[start:start + ngroup, part:part + nparts] = \
+                    np.ascontiguousarray(
+                        pairs[start:start + ngroup,
+                              part:part + nparts + width - 1]) \
+                    @ band[:nparts + width - 1, :nparts]
+    res = res.reshape(nrows * width, -1)
+    return res[:n - width + 1:shift].reshape((-1, ) + x.shape[1:])
 
 
 def _windowed_weighted(x, weights, shift):
-    xnans = np.isnan(x)
-    if not np.any(xnans):
-        return np.sum(_windowed(x, len(weights), shift) * weights, axis=1)
+    if len(weights) > len(x):
+        return np.empty((0, ) + x.shape[1:])
+    finite = np.isfinite(x)
+    if np.all(finite):
+        return _windowed_dot(x, weights, shift)
 
     # Recompute weights for each line so that the total sum is the same
     # after skipping the weights that correspond to nan
     # If the sum of weights is 1, this is just "renormalization"
-    x = x.copy()
-    windows = _windowed(x, len(weights), shift)
-    nans = np.isnan(windows)
-    total_weight = np.sum(weights)
-    weights = np.repeat(weights[None, :], len(windows), axis=0)
-    weights[nans] = 0
-    x[xnans] = 0
-    weightsums = np.sum(weights, axis=1) / total_weight
-    no_data = weightsums == 0
-    weightsums[no_data] = 1
-    res = np.sum(windows * weights, axis=1) / weightsums
-    res[no_data] = np.nan
+    xnans = np.isnan(x)
+    res = _windowed_dot(np.where(finite, x, 0), weights, shift)
+    if np.any(xnans):
+        weightsums = _windowed_dot(~xnans, weights, shift) / np.sum(weights)
+        no_data = weightsums == 0
+        weightsums[no_data] = 1
+        res /= weightsums
+        res[no_data] = np.nan
+    # Infinite values are excluded from products (inf * 0 would give nan
+    # in windows without them) and counted separately, as in _window_sum
+    if not np.all(finite | xnans):
+        nonzero = (weights != 0).astype(float)
+        positive = _windowed_dot(x == np.inf, nonzero, shift) > 0
+        negative = _windowed_dot(x == -np.inf, nonzero, shift) > 0
+        res[positive] = np.inf
+        res[negative] = -np.inf
+        res[positive & negative] = np.nan
     return res
 
 
+def windowed_kernel_MA(x, weights, shift=1):
+    weights = np.asarray(weights, dtype=float)
+    return _windowed_weighted(x, weights / np.sum(weights), shift)
+
+
 def windowed_linear_MA(x, width, shift):
     weights = np.arange(1, width + 1, dtype=float)
     weights /= np.sum(weights)
@@ -83,43 +511,633 @@ def windowed_exponential_MA(x, width, shift):
     return _windowed_weighted(x, weights, shift)
 
 
+def windowed_triangular_MA(x, width, shift):
+    return windowed_kernel_MA(x, signal.windows.triang(width), shift)
+
+
+def windowed_gaussian_MA(x, width, shift):
+    return windowed_kernel_MA(
+        x, signal.windows.gaussian(width, std=width / 6), shift)
+
+
+def windowed_hann_MA(x, width, shift):
+    # Strip the zeros at both ends, so all values in the window have weight
+    return windowed_kernel_MA(x, signal.windows.hann(width + 2)[1:-1], shift)
+
+
+def _exponential_filter(x, width, state=None):
+    # Exponential smoothing over the entire history, y_t = a x_t + (1 - a) y_t-1,
+    # computed as a ratio of two filtered signals: values with nans set to
+    # zero, and the indicator of defined values. This skips missing values
+    # and renormalizes the weights of the rest, like _windowed_weighted does.
+    # Returns smoothed values and the state for continuing the filtering.
+    alpha = 2 / (width + 1.0)
+    defined = ~np.isnan(x)
+    denominator = [1, alpha - 1]
+    if state is None:
+        state = (np.zeros((1, ) + x.shape[1:]), ) * 2
+    if not len(x):  # lfilter returns garbage state for empty arrays
+        return np.empty(x.shape), state
+    sums, sums_state = signal.lfilter(
+        [1], denominator, np.where(defined, x, 0), axis=0, zi=state[0])
+    weights, weights_state = signal.lfilter(
+        [1], denominator, defined.astype(float), axis=0, zi=state[1])
+    with np.errstate(invalid="ignore"):
+        return sums / weights, (sums_state, weights_state)
+
+
+def recursive_exponential_MA(x, width, shift=1):
+    if width > len(x):
+        return np.empty((0, ) + x.shape[1:])
+    return _exponential_filter(x, width)[0][width - 1::shift]
+
+
 def windowed_cumsum(x, width, shift):
-    return np.nancumsum(x)[width - 1::shift]
+    return np.nancumsum(x, axis=0)[width - 1::shift]
 
 
 def windowed_cumprod(x, width, shift):
-    return np.nancumprod(x)[width - 1::shift]
+    return np.nancumprod(x, axis=0)[width - 1::shift]
 
 
-def windowed_mode(x, width, shift):
-    modes, counts = windowed_func(
-        partial(stats.mode, nan_policy='omit'),
-        x, width, shift)
-    modes = modes[:, 0]
-    if np.ma.isMaskedArray(modes):
-        # If counts == 0, all values were nan
-        modes = modes.data
-        modes[counts[:, 0] == 0] = np.nan
+def _moving_mode_counts(x, values, width, shift):
+    # Sliding histogram: moving counts of each value, keeping the value with
+    # the highest count; values are ascending, so ties go to the smallest,
+    # as in scipy.stats.mode
+    nwindows = _nwindows(x, width, shift)
+    best = np.zeros(nwindows)
+    modes = np.full(nwindows, np.nan)
+    for value in values:
+        counts = moving_sum(x == value, width, shift)
+        better = counts > best
+        best[better] = counts[better]
+        modes[better] = value
     return modes
 
 
-def windowed_harmonic_mean(x, width, shift):
+def _moving_mode_sorted(x, width, shift, chunk_size=2 ** 22):
+    # Sort each window and find the longest run of equal values; nans are
+    # sorted to the end and excluded. Windows are processed in chunks to
+    # bound the memory for the sorted copies
     windows = _windowed(x, width, shift)
-    try:
-        return stats.hmean(windows, axis=1)
-    except ValueError:
-        r = np.full(len(windows), np.nan)
-        for i, window in enumerate(windows):
-            try:
-                r[i] = stats.hmean(window)
-            except ValueError:
-                pass
-        return r
+    modes = np.empty(len(windows))
+    step = max(1, chunk_size // width)
+    pos = np.arange(width)
+    for start in range(0, len(windows), step):
+        chunk = np.sort(windows[start:start + step], axis=1)
+        new_run = np.ones(chunk.shape, dtype=bool)
+        new_run[:, 1:] = chunk[:, 1:] != chunk[:, :-1]
+        run_starts = np.maximum.accumulate(np.where(new_run, pos, 0), axis=1)
+        run_lengths = pos - run_starts + 1
+        run_lengths[np.isnan(chunk)] = 0
+        best = np.argmax(run_lengths, axis=1)
+        rows = np.arange(len(chunk))
+        chunk_modes = chunk[rows, best]
+        chunk_modes[run_lengths[rows, best] == 0] = np.nan
+        modes[start:start + step] = chunk_modes
+    return modes
+
+
+def _moving_mode_histogram(x, width, shift):
+    # Sliding histogram: counts of values in the current window and, for
+    # each count, a sorted list of values with that count; the mode is the
+    # smallest value with the highest count, as in scipy.stats.mode. Values
+    # are replaced by their indices among the sorted distinct values, and
+    # updates are a binary search and a memmove in a list of values with the
+    # same count, so the cost per step is practically independent of width
+    defined = ~np.isnan(x)
+    values, codes = np.unique(x[defined], return_inverse=True)
+    all_codes = np.full(len(x), -1)
+    all_codes[defined] = codes
+    codes = all_codes.tolist()
+    counts = [0] * len(values)
+    with_count = [[] for _ in range(width + 2)]  # insert before removing
+    best = 0
+    modes = [-1] * _nwindows(x, width, shift)
+    for i, code in enumerate(codes):
+        if code >= 0:
+            count = counts[code]
+            if count:
+                same = with_count[count]
+                del same[bisect_left(same, code)]
+            counts[code] = count = count + 1
+            insort(with_count[count], code)
+            if count > best:
+                best = count
+        if i >= width:
+            code = codes[i - width]
+            if code >= 0:
+                count = counts[code]
+                same = with_count[count]
+                del same[bisect_left(same, code)]
+                if count == best and not same:
+                    best -= 1
+                counts[code] = count = count - 1
+                if count:
+                    insort(with_count[count], code)
+        start = i - width + 1
+        if start >= 0 and not start % shift and best:
+            modes[start // shift] = with_count[best][0]
+    modes = np.array(modes, dtype=int)
+    res = np.full(len(modes), np.nan)
+    res[modes >= 0] = values[modes[modes >= 0]]
+    return res
+
+
+@_by_columns
+def windowed_mode(x, width, shift):
+    if width > x.size:
+        return np.empty(0)
+    if _backend == "numba":
+        return _aggregate_numba.moving_mode(x.astype(float), width, shift)
+    values = np.unique(x[~np.isnan(x)])
+    # Counting costs a pass per distinct value, sorting costs w log w per
+    # window, and the histogram has a constant, but (Python) loop-bound cost
+    # per row; the thresholds are empirical
+    if len(values) <= 50:
+        return _moving_mode_counts(x, values, width, shift)
+    if width <= 16:
+        return _moving_mode_sorted(x, width, shift)
+    return _moving_mode_histogram(x, width, shift)
+
+
+def _power_mean(x, window_sum, sizes, forward, backward):
+    # Means of positive values that are computed by averaging transformed
+    # values; they are 0 if the window contains a 0 and undefined if it
+    # contains a negative or missing value, like in scipy.stats.
+    # window_sum(values) returns sums over windows of `sizes` rows.
+    with np.errstate(invalid="ignore"):
+        invalid = ~(x >= 0)
+    zero = x == 0
+    positive = ~(invalid | zero)
+    transformed = np.zeros(x.shape)
+    transformed[positive] = forward(x[positive].astype(float))
+    res = backward(window_sum(transformed) / sizes)
+    res[window_sum(zero) > 0] = 0
+    res[window_sum(invalid) > 0] = np.nan
+    return res
+
+
+def _moving_power_mean(x, width, shift, forward, backward):
+    if width > len(x):
+        return np.empty((0, ) + x.shape[1:])
+    return _power_mean(x, partial(moving_sum, width=width, shift=shift),
+                       width, forward, backward)
+
+
+def windowed_harmonic_mean(x, width, shift):
+    return _moving_power_mean(x, width, shift, np.reciprocal, np.reciprocal)
+
+
+def windowed_geometric_mean(x, width, shift):
+    return _moving_power_mean(x, width, shift, np.log, np.exp)
+
+
+def group_offsets(indices, ngroups):
+    # Returns a stable permutation that sorts rows by groups, and offsets of
+    # groups within it, with len(indices) appended as the last offset
+    order = np.argsort(indices, kind="stable")
+    offsets = np.zeros(ngroups + 1, dtype=int)
+    np.cumsum(np.bincount(indices, minlength=ngroups), out=offsets[1:])
+    return order, offsets
+
+
+def aggregate_groups(x, order, offsets, agg):
+    # Aggregates x (along axis 0) within groups given by group_offsets.
+    # Group transforms work on sorted x and offsets of (non-empty) groups;
+    # other aggregations are aggregated as ranges of sorted x.
+    # Empty groups give nan.
+    x = x[order]
+    if agg.group_transform is None:
+        return aggregate_ranges(x, offsets[:-1], offsets[1:], agg)
+    nonempty = offsets[1:] > offsets[:-1]
+    starts = offsets[:-1][nonempty]
+    res = np.full((len(nonempty), ) + x.shape[1:], np.nan)
+    if len(starts):
+        res[nonempty] = agg.group_transform(x, starts)
+    return res
+
+
+def _group_reduce(ufunc, x, starts, fill):
+    res = ufunc.reduceat(np.where(np.isnan(x), fill, x), starts, axis=0)
+    if fill in (np.inf, -np.inf):
+        res[_group_count(x, starts) == 0] = np.nan
+    return res
+
+
+def _group_count(x, starts):
+    return np.add.reduceat(~np.isnan(x), starts, axis=0, dtype=int)
+
+
+def _group_moments(x, starts):
+    # Variance is computed from deviations from group means (as in np.nanvar)
+    count = _group_count(x, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = _group_reduce(np.add, x, starts, 0) / count
+        sizes = np.diff(np.append(starts, len(x)))
+        dev = np.where(np.isnan(x), 0, x - np.repeat(mean, sizes, axis=0))
+        var = np.add.reduceat(dev * dev, starts, axis=0) / count
+    return mean, var
+
+
+def group_count_nonzero(x, starts):
+    return np.add.reduceat((x != 0) & np.isfinite(x), starts, axis=0,
+                           dtype=int)
+
+
+def group_count_defined(x, starts):
+    return np.add.reduceat(np.isfinite(x), starts, axis=0, dtype=int)
+
+
+def group_mean(x, starts):
+    return _group_moments(x, starts)[0]
+
+
+def group_var(x, starts):
+    return _group_moments(x, starts)[1]
+
+
+def group_std(x, starts):
+    return np.sqrt(group_var(x, starts))
+
+
+def _group_power_sums(x, starts, order):
+    # Counts and sums of powers of deviations from group means
+    defined = ~np.isnan(x)
+    sizes = np.diff(np.append(starts, len(x)))
+    with np.errstate(invalid="ignore"):
+        dev = np.where(
+            defined, x - np.repeat(group_mean(x, starts), sizes, axis=0), 0)
+    power = defined.astype(float)
+    sums = []
+    for _ in range(order + 1):
+        sums.append(np.add.reduceat(power, starts, axis=0))
+        power = power * dev
+    return sums
+
+
+def group_skew(x, starts):
+    return _standardized_moment(_group_power_sums(x, starts, 3), 3)
+
+
+def group_kurtosis(x, starts):
+    return _standardized_moment(_group_power_sums(x, starts, 4), 4)
+
+
+def _group_power_mean(x, starts, forward, backward):
+    sizes = np.diff(np.append(starts, len(x)))
+    return _power_mean(
+        x, partial(np.add.reduceat, indices=starts, axis=0, dtype=float),
+        sizes.reshape((-1, ) + (1, ) * (x.ndim - 1)), forward, backward)
+
+
+def group_harmonic_mean(x, starts):
+    return _group_power_mean(x, starts, np.reciprocal, np.reciprocal)
+
+
+def group_geometric_mean(x, starts):
+    return _group_power_mean(x, starts, np.log, np.exp)
+
+
+def group_span(x, starts):
+    return _group_reduce(np.maximum, x, starts, -np.inf) \
+        - _group_reduce(np.minimum, x, starts, np.inf)
+
+
+def time_windows(times, duration):
+    # Bounds of windows that end at each row and include rows with times
+    # within (t - duration, t]; times must be sorted
+    starts = np.searchsorted(times, times - duration, side="right")
+    return starts, np.arange(1, len(times) + 1)
+
+
+def aggregate_ranges(x, starts, ends, agg):
+    # Aggregates x (along axis 0) within ranges starts[i]:ends[i] of
+    # arbitrary lengths. Range transforms compute all ranges at once; other
+    # aggregations apply block_transform to each range. Empty ranges give nan.
+    nonempty = ends > starts
+    res = np.full((len(starts), ) + x.shape[1:], np.nan)
+    if not np.any(nonempty):
+        return res
+    if agg.range_transform is not None:
+        res[nonempty] = \
+            agg.range_transform(x, starts[nonempty], ends[nonempty])
+    else:
+        func = agg.block_transform
+        for i in np.flatnonzero(nonempty):
+            window = x[starts[i]:ends[i]]
+            res[i] = func(window) if x.ndim == 1 \
+                else [func(col) for col in window.T]
+    return res
+
+
+def _by_range_length(func, x, starts, ends, **kwargs):
+    # Calls func(x, starts, ends, block, **kwargs) for groups of ranges with
+    # lengths in (block / 2, block], where block is a power of 2, so that
+    # precision of sums within blocks depends only on values close to the
+    # range. func returns an array or a tuple of arrays for ranges.
+    levels = np.frexp(np.maximum(ends - starts, 1) - 1)[1]
+    res = None
+    for level in np.unique(levels) if len(levels) else [0]:
+        mask = levels == level
+        level_res = func(x, starts[mask], ends[mask], 1 << level, **kwargs)
+        if not isinstance(level_res, tuple):
+            level_res = (level_res, )
+        if res is None:
+            res = tuple(np.empty((len(starts), ) + part.shape[1:], part.dtype)
+                        for part in level_res)
+        for part, level_part in zip(res, level_res):
+            part[mask] = level_part
+    return res if len(res) > 1 else res[0]
+
+
+def range_sum(x, starts, ends):
+    return _by_range_length(_window_sum, x, starts, ends)
+
+
+def range_count_nonzero(x, starts, ends):
+    return range_sum((x != 0) & np.isfinite(x), starts, ends)
+
+
+def range_count_defined(x, starts, ends):
+    return range_sum(np.isfinite(x), starts, ends)
+
+
+def _range_moments(x, starts, ends, defined=None):
+    # Like _moving_moments, but for ranges of arbitrary lengths
+    return _by_range_length(_moments, x, starts, ends, defined=defined)
+
+
+def range_mean(x, starts, ends):
+    return _range_moments(x, starts, ends)[0]
+
+
+def range_var(x, starts, ends):
+    return _range_moments(x, starts, ends)[1]
+
+
+def range_std(x, starts, ends):
+    return np.sqrt(range_var(x, starts, ends))
+
+
+def _range_standardized_moment(x, starts, ends, order):
+    # Like _moving_standardized_moment, but for ranges of arbitrary lengths
+    sums = _by_range_length(
+        lambda *args, **kwargs: tuple(_power_sums(*args, **kwargs)[1]),
+        x, starts, ends, order=order)
+    return _standardized_moment(sums, order)
+
+
+def range_skew(x, starts, ends):
+    return _range_standardized_moment(x, starts, ends, 3)
+
+
+def range_kurtosis(x, starts, ends):
+    return _range_standardized_moment(x, starts, ends, 4)
+
+
+def _range_power_mean(x, starts, ends, forward, backward):
+    sizes = ends - starts
+    return _power_mean(
+        x, partial(range_sum, starts=starts, ends=ends),
+        sizes.reshape((-1, ) + (1, ) * (x.ndim - 1)), forward, backward)
+
+
+def range_harmonic_mean(x, starts, ends):
+    return _range_power_mean(x, starts, ends, np.reciprocal, np.reciprocal)
+
+
+def range_geometric_mean(x, starts, ends):
+    return _range_power_mean(x, starts, ends, np.log, np.exp)
+
+
+def _range_extreme(x, starts, ends, ufunc, fill, nans=None, count=None):
+    # Sparse table: level k contains extremes of 2 ** k consecutive values,
+    # so any range is covered by two (overlapping) intervals from one level
+    if nans is None:
+        nans = np.isnan(x)
+    if count is None:
+        count = range_sum(~nans, starts, ends)
+    levels = np.log2(ends - starts).astype(int)
+    table = [np.where(nans, fill, x)]
+    for level in range(1, np.max(levels, initial=0) + 1):
+        prev, step = table[-1], 1 << (level - 1)
+        table.append(ufunc(prev[:-step], prev[step:]))
+    res = np.empty((len(starts), ) + x.shape[1:])
+    for level in np.unique(levels):
+        mask = levels == level
+        res[mask] = ufunc(table[level][starts[mask]],
+                          table[level][ends[mask] - (1 << level)])
+    res[count == 0] = np.nan
+    return res
+
+
+def range_statistics(x, starts, ends, statistics=MOVING_STATISTICS):
+    # Like moving_statistics, but for (non-empty) ranges of arbitrary lengths;
+    # prefix sums and the sparse table are computed once for all ranges
+    return _window_statistics(
+        x, statistics,
+        partial(range_sum, starts=starts, ends=ends),
+        partial(_range_extreme, starts=starts, ends=ends),
+        partial(_range_moments, starts=starts, ends=ends))
+
+
+def multi_width_statistics(x, widths, statistics=MOVING_STATISTICS):
+    # Computes statistics for sliding windows (with shift 1) of several
+    # widths at once: windows of all widths are ranges for range_statistics.
+    # Returns a list with a dict of statistics for each width.
+    n = len(x)
+    ends = [np.arange(width, n + 1) for width in widths]
+    starts = [width_ends - width for width, width_ends in zip(widths, ends)]
+    res = range_statistics(
+        x, np.concatenate(starts), np.concatenate(ends), statistics)
+    splits = np.cumsum([len(width_ends) for width_ends in ends])[:-1]
+    return [dict(zip(res, values))
+            for values in zip(*(np.split(values, splits)
+                                for values in res.values()))]
+
+
+def _range_apply(kernel, func, x, starts, ends, *args):
+    # Applies a compiled kernel to each column, or func to each range
+    if _backend == "numba":
+        kernel = getattr(_aggregate_numba, kernel)
+        columns = x.reshape(len(x), -1).T
+        res = [kernel(np.ascontiguousarray(col, dtype=float),
+                      starts, ends, *args)
+               for col in columns]
+        return np.array(res).T.reshape((len(starts), ) + x.shape[1:])
+    if x.ndim == 1:
+        return np.array([func(x[start:end], *args)
+                         for start, end in zip(starts, ends)])
+    return np.array([[func(col, *args) for col in x[start:end].T]
+                     for start, end in zip(starts, ends)])
+
+
+def range_quantile(x, starts, ends, q=0.5):
+    return _range_apply("range_quantile", np.nanquantile,
+                        x, starts, ends, q)
+
+
+def range_mode(x, starts, ends):
+    return _range_apply("range_mode", block_mode, x, starts, ends)
+
+
+def range_min(x, starts, ends):
+    return _range_extreme(x, starts, ends, np.minimum, np.inf)
+
+
+def range_max(x, starts, ends):
+    return _range_extreme(x, starts, ends, np.maximum, -np.inf)
+
+
+def range_span(x, starts, ends):
+    return range_max(x, starts, ends) - range_min(x, starts, ends)
+
+
+class MovingAggregator:
+    # Computes agg.transform incrementally: consecutive chunks of data are
+    # fed to `update`, which returns aggregates of windows that end within
+    # the chunk. Kernels of blockwise aggregations sum values within blocks
+    # of `width` rows anchored at the first row, so the kept rows start at
+    # a block boundary; windows are computed with a step that divides the
+    # width and the shift, gcd(width, shift), and those that start at
+    # multiples of shift and were not computed yet are returned. Other
+    # kernels do not depend on where the data starts, so the kept rows start
+    # at the next window. Either way, less than two widths of rows are kept,
+    # and the results are the same as when processing the data at once.
+    def __init__(self, agg, width, shift=1):
+        self.agg = agg
+        self.width = width
+        self.shift = shift
+        self._anchor = width if agg.blockwise else shift
+        self._step = int(np.gcd(self._anchor, shift))
+        self._buffer = None
+        self._offset = 0  # index of the first kept row
+        self._next_window = 0  # index of the first row of the next window
+        self._end = 0  # number of rows fed so far
+
+    def init(self, x):
+        # Set the state as if x was fed to update, without computing
+        x = self._extend(x)
+        nwindows = 0 if self.width > self._end \
+            else 1 + (self._end - self.width) // self.shift
+        self._next_window = max(self._next_window, nwindows * self.shift)
+        self._keep(x)
+
+    def update(self, x):
+        x = self._extend(x)
+        done = (self._next_window - self._offset) // self._step
+        res = self.agg.transform(x, self.width, self._step)[
+            done::self.shift // self._step]
+        self._next_window += len(res) * self.shift
+        self._keep(x)
+        return res
+
+    def _extend(self, x):
+        # Skip the rows before the kept ones and prepend the kept ones;
+        # the result starts at row self._offset (or is empty)
+        skip = min(max(self._offset - self._end, 0), len(x))
+        self._end += len(x)
+        x = x[skip:]
+        if self._buffer is not None:
+            x = np.concatenate((self._buffer, x))
+        return x
+
+    def _keep(self, x):
+        offset = self._next_window // self._anchor * self._anchor
+        self._buffer = x[offset - self._offset:].copy()
+        self._offset = offset
+
+
+class CumulativeAggregator(MovingAggregator):
+    # Aggregations over the entire history (cumulative sum and product);
+    # accumulation continues from the last accumulated value, so the results
+    # are the same as if data was processed at once
+    def __init__(self, agg, width, shift=1):
+        super().__init__(agg, width, shift)
+        self._state = None
+        self._next = width - 1  # index of the next output row in new data
+
+    def init(self, x):
+        self.update(x)
+
+    def update(self, x):
+        if self._state is None:
+            values = self.agg.cumulative(x)
+        else:
+            values = self.agg.cumulative(
+                np.concatenate((self._state[None], x)))[1:]
+        if len(values):
+            self._state = values[-1]
+        return self._outputs(values)
+
+    def _outputs(self, values):
+        res = values[self._next::self.shift]
+        self._next += len(res) * self.shift - len(values)
+        return res
+
+
+class ExponentialAggregator(CumulativeAggregator):
+    # Recursive exponential moving average, which continues filtering from
+    # the state of the filter after previous data
+    def update(self, x):
+        values, self._state = _exponential_filter(x, self.width, self._state)
+        return self._outputs(values)
+
+
+def aggregate_chunked(x, agg, width, shift=1, out=None, chunk_size=2 ** 20):
+    # Computes agg.transform of x (e.g. a memory-mapped column) in chunks of
+    # chunk_size rows, so that only a chunk and less than two widths of rows
+    # before it are in memory (see MovingAggregator). The result is written into out (e.g. a
+    # memory-mapped array, or a new array, if None), which is returned.
+    shape = (_nwindows(x, width, shift), ) + x.shape[1:]
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError(f"output shape must be {shape}, not {out.shape}")
+    aggregator = agg.make_aggregator(width, shift)
+    pos = 0
+    for start in range(0, len(x), chunk_size):
+        res = aggregator.update(np.asarray(x[start:start + chunk_size]))
+        out[pos:pos + len(res)] = res
+        pos += len(res)
+    return out
+
+
+def worker_count(n_jobs=None):
+    return n_jobs or os.cpu_count() or 1
+
+
+def run_jobs(jobs, n_jobs=None):
+    # Calls functions (without arguments) in a pool of n_jobs threads, or as
+    # many as there are cores, and returns results in the order of jobs.
+    # Most NumPy kernels release the GIL, so the jobs run in parallel.
+    jobs = list(jobs)
+    n_jobs = min(worker_count(n_jobs), len(jobs))
+    if n_jobs <= 1:
+        return [job() for job in jobs]
+    with ThreadPoolExecutor(n_jobs) as executor:
+        futures = [executor.submit(job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def apply_aggregations(table, spec, width, shift=1, n_jobs=None):
+    # Computes sliding aggregations of table's columns in parallel; spec is a
+    # list of pairs (variable or its name, aggregation's name in AggOptions).
+    # Returns an array with a column for each pair, in the order of spec.
+    jobs = [partial(AggOptions[name].transform, table.get_column(var),
+                    width, shift)
+            for var, name in spec]
+    columns = run_jobs(jobs, n_jobs)
+    if not columns:
+        return np.empty((_nwindows(table, width, shift), 0))
+    return np.column_stack(columns)
 
 
 def block_mode(x):
-    mode = stats.mode(x, nan_policy='omit').mode
-    return float(mode) if mode.size else np.nan
+    # stats.mode gives 0 for all-nan arrays; return nan, like windowed_mode
+    x = x[~np.isnan(x)]
+    return float(stats.mode(x).mode) if x.size else np.nan
 
 
 @dataclasses.dataclass
@@ -132,6 +1150,11 @@ class AggDesc:
     count_aggregate: bool = False
     cumulative: Optional[Callable] = None
     same_scale: bool = False
+    group_transform: Optional[Callable] = None
+    range_transform: Optional[Callable] = None
+    aggregator: Callable = MovingAggregator
+    # transform sums floats within blocks of width rows (see _block_sums)
+    blockwise: bool = False
 
     def __new__(cls, short_desc, *args, **kwargs):
         self = super().__new__(cls)
@@ -142,45 +1165,91 @@ class AggDesc:
     def long_desc(self):
         return self._long_desc or self.short_desc.title()
 
+    def make_aggregator(self, width, shift=1):
+        return self.aggregator(self, width, shift)
+
 
 def pmw(*args):
     return partial(windowed_func, *args)
 
 
 AggOptions: Dict[str, AggDesc] = {}
-AggDesc("mean", pmw(np.nanmean), np.nanmean, "Mean value",
-        same_scale=True)
-AggDesc("sum", moving_sum, np.nansum)
-AggDesc('product', pmw(np.nanprod), np.nanprod)
-AggDesc('min', pmw(np.nanmin), np.nanmin, "Minimum",
-        same_scale=True)
-AggDesc('max', pmw(np.nanmax), np.nanmax, "Maximum",
-        same_scale=True)
+AggDesc("mean", moving_mean, np.nanmean, "Mean value",
+        same_scale=True, group_transform=group_mean,
+        range_transform=range_mean, blockwise=True)
+AggDesc("sum", moving_sum, np.nansum,
+        group_transform=partial(_group_reduce, np.add, fill=0),
+        range_transform=range_sum, blockwise=True)
+AggDesc('product', pmw(np.nanprod), np.nanprod,
+        group_transform=partial(_group_reduce, np.multiply, fill=1))
+AggDesc('min', moving_min, np.nanmin, "Minimum",
+        same_scale=True,
+        group_transform=partial(_group_reduce, np.minimum, fill=np.inf),
+        range_transform=range_min)
+AggDesc('max', moving_max, np.nanmax, "Maximum",
+        same_scale=True,
+        group_transform=partial(_group_reduce, np.maximum, fill=-np.inf),
+        range_transform=range_max)
 AggDesc('span', windowed_span,
-        lambda x: np.nanmax(x) - np.nanmin(x), "Span")
-AggDesc('median', pmw(np.nanmedian), np.nanmedian,
-        same_scale=True)
+        lambda x: np.nanmax(x) - np.nanmin(x), "Span",
+        group_transform=group_span, range_transform=range_span)
+AggDesc('median', moving_median, np.nanmedian,
+        same_scale=True, range_transform=range_quantile)
+AggDesc('q1', partial(moving_quantile, q=0.25),
+        partial(np.nanquantile, q=0.25), "First quartile", same_scale=True,
+        range_transform=partial(range_quantile, q=0.25))
+AggDesc('q3', partial(moving_quantile, q=0.75),
+        partial(np.nanquantile, q=0.75), "Third quartile", same_scale=True,
+        range_transform=partial(range_quantile, q=0.75))
 AggDesc('mode', windowed_mode, block_mode,
-        supports_discrete=True, same_scale=True)
-AggDesc('std', pmw(np.nanstd), np.nanstd, "Standard deviation", same_scale=True)
-AggDesc('var', pmw(np.nanvar), np.nanvar, "Variance")
-AggDesc('lin. MA', windowed_linear_MA, None, "Linear MA", same_scale=True)
+        supports_discrete=True, same_scale=True, range_transform=range_mode)
+AggDesc('std', moving_std, np.nanstd, "Standard deviation", same_scale=True,
+        group_transform=group_std, range_transform=range_std,
+        blockwise=True)
+AggDesc('var', moving_var, np.nanvar, "Variance",
+        group_transform=group_var, range_transform=range_var,
+        blockwise=True)
+AggDesc('skew', moving_skew, partial(stats.skew, nan_policy="omit"),
+        "Skewness", group_transform=group_skew, range_transform=range_skew,
+        blockwise=True)
+AggDesc('kurtosis', moving_kurtosis,
+        partial(stats.kurtosis, nan_policy="omit"), "Kurtosis",
+        group_transform=group_kurtosis, range_transform=range_kurtosis,
+        blockwise=True)
+AggDesc('lin. MA', windowed_linear_MA, None, "Linear MA", same_scale=True,
+        blockwise=True)
 AggDesc('exp. MA', windowed_exponential_MA, None, "Exponential MA",
-        same_scale=True)
+        same_scale=True, blockwise=True)
+AggDesc('tri. MA', windowed_triangular_MA, None, "Triangular MA",
+        same_scale=True, blockwise=True)
+AggDesc('gauss. MA', windowed_gaussian_MA, None, "Gaussian MA",
+        same_scale=True, blockwise=True)
+AggDesc('Hann MA', windowed_hann_MA, None, "Hann MA", same_scale=True,
+        blockwise=True)
+AggDesc('EWMA', recursive_exponential_MA, None,
+        "Exp. weighted MA", same_scale=True, aggregator=ExponentialAggregator)
 AggDesc('harmonic', windowed_harmonic_mean, stats.hmean, "Harmonic mean",
-        same_scale=True)
-AggDesc('geometric', pmw(stats.gmean), stats.gmean, "Geometric mean",
-        same_scale=True)
+        same_scale=True, group_transform=group_harmonic_mean,
+        range_transform=range_harmonic_mean, blockwise=True)
+AggDesc('geometric', windowed_geometric_mean, stats.gmean, "Geometric mean",
+        same_scale=True, group_transform=group_geometric_mean,
+        range_transform=range_geometric_mean, blockwise=True)
 AggDesc('non-zero', moving_count_nonzero,
         lambda x: np.sum((x != 0) & np.isfinite(x)), "Non-zero count",
-        supports_discrete=True, count_aggregate=True)
+        supports_discrete=True, count_aggregate=True,
+        group_transform=group_count_nonzero,
+        range_transform=range_count_nonzero)
 AggDesc('defined', moving_count_defined,
         lambda x: np.sum(np.isfinite(x)), "Defined count",
-        supports_discrete=True, count_aggregate=True)
+        supports_discrete=True, count_aggregate=True,
+        group_transform=group_count_defined,
+        range_transform=range_count_defined)
 AggDesc('cumsum', windowed_cumsum, None, "Cumulative sum",
-        cumulative=np.nancumsum)
+        cumulative=partial(np.nancumsum, axis=0),
+        aggregator=CumulativeAggregator)
 AggDesc('cumprod', windowed_cumprod, None, "Cumulative product",
-        cumulative=np.nancumprod)
+        cumulative=partial(np.nancumprod, axis=0),
+        aggregator=CumulativeAggregator)
 
 
 @dataclasses.dataclass
@@ -225,25 +1294,32 @@ def time_blocks(data: Timeseries,
                 period: PeriodDesc,
                 attr_name: Sequence[str],
                 use_period_names: bool):
-    times = (utc_from_timestamp(x)
-             for x in data.get_column(data.time_variable))
+    # Timestamps are rounded to microseconds, like in utc_from_timestamp
+    times = np.round(data.get_column(data.time_variable) * 1e6) \
+        .astype(np.int64).view("datetime64[us]")
     if period.periodic:
-        if period.value_as_period:
-            times = [x.timetuple()[period.struct_index] for x in times]
-        elif period.name == "Day of week":
-            times = [d.weekday() for d in times]
+        days = times.astype("datetime64[D]")
+        if period.name == "Day of week":
+            # 1970-01-01 was Thursday
+            times = (days.astype(np.int64) + 3) % 7
         elif period.name == "Day of year":
-            times = [d.toordinal() - date(d.year, 1, 1).toordinal() + 1
-                     for d in times]
-        times = np.array(times) + period.value_offset
+            times = (days - times.astype("datetime64[Y]")).astype(np.int64) + 1
+        elif period.struct_index == 1:
+            times = times.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        elif period.struct_index == 2:
+            times = (days - times.astype("datetime64[M]")).astype(np.int64) + 1
+        else:
+            assert period.struct_index == 3
+            times = (times.astype("datetime64[h]") - days).astype(np.int64)
+        times += period.value_offset
         if period.names and use_period_names:
             attribute = DiscreteVariable(attr_name, values=period.names)
         else:
             attribute = ContinuousVariable(attr_name)
     else:
-        ind = period.struct_index
-        times = (truncated_date(x, ind) for x in times)
-        times = [calendar.timegm(x.timetuple()) for x in times]
+        unit = "YMDhms"[period.struct_index]
+        times = times.astype(f"datetime64[{unit}]") \
+            .astype("datetime64[s]").astype(np.int64)
         attribute = data.time_variable.copy(name=attr_name)
 
     periods, period_indices, counts = \
@@ -252,4 +1328,3 @@ def time_blocks(data: Timeseries,
         periods += 1
 
     return attribute, periods, period_indices, counts
-
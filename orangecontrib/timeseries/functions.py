@@ -51,7 +51,7 @@ def pocid(true, pred):
 
 def _detrend(x, type):
     if type == 'diff':
-        x = np.diff(x)
+        x = np.diff(x, axis=0)
     elif isinstance(type, str):
         type = dict(constant=0, linear=1, quadratic=2, cubic=3)[type]
     if isinstance(type, Number):
@@ -106,6 +106,81 @@ def periodogram(x, *args, detrend='diff', **kwargs):
     return periods, pgram
 
 
+def periodogram_welch(x, nperseg=None, noverlap=None, nfft=None, *,
+                      detrend='diff', window='hann'):
+    """
+    Return periodograms of signals in columns of `x`, averaged over
+    overlapping segments (Welch's method).
+
+    Averaging reduces the variance of the estimate on long series. The
+    segments of all columns are transformed with a single FFT.
+
+    Parameters
+    ----------
+    x: array_like
+        A 1D signal or a 2D array (n x k) of signals in columns.
+    nperseg: int, optional
+        Length of segments; defaults to the length of the series. The
+        longest period that can be detected is nperseg.
+    noverlap: int, optional
+        Number of values shared by consecutive segments; defaults to
+        nperseg // 2.
+    nfft: int, optional
+        Length of the FFT; segments are padded with zeros to this length to
+        compute the spectrum at more periods. Defaults to nperseg.
+    detrend: 'diff' or False or int
+        Remove trend from x. If int, fit and subtract a polynomial of this
+        order. See also: `statsmodels.tsa.detrend`.
+    window: str or tuple or array_like
+        Window applied to segments, as accepted by
+        `scipy.signal.get_window`.
+
+    Returns
+    -------
+    periods: array_like
+        The periods at which the spectral density is calculated.
+    pgram: array_like
+        Power spectral density of x.
+
+    If x is 2D, a list of (periods, pgram) for each column is returned.
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+    from scipy.signal import get_window
+
+    x = np.asarray(x, dtype=float)
+    X = _detrend(x.reshape(len(x), -1), detrend)
+    n = len(X)
+    nperseg = nperseg or n
+    nfft = nfft or nperseg
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if not 0 <= noverlap < nperseg:
+        raise ValueError("noverlap must be smaller than nperseg")
+    if nfft < nperseg:
+        raise ValueError("nfft must not be smaller than nperseg")
+    # Segments cannot be longer than the series
+    nperseg = min(nperseg, n)
+    noverlap = max(min(noverlap, nperseg - 1), 0)
+    win = get_window(window, nperseg) if isinstance(window, (str, tuple)) \
+        else np.asarray(window, dtype=float)
+    if len(win) != nperseg:
+        raise ValueError("window must have nperseg values")
+
+    # segments x columns x values
+    segments = sliding_window_view(X, nperseg, axis=0)[::nperseg - noverlap]
+    segments = segments - segments.mean(axis=2, keepdims=True)
+    spectra = np.abs(np.fft.rfft(segments * win, n=nfft, axis=2)) ** 2
+    pgrams = spectra.mean(axis=0) / np.sum(win ** 2)
+    # one-sided density: add power of negative frequencies
+    pgrams[:, 1:(nfft + 1) // 2] *= 2
+    freqs = np.fft.rfftfreq(nfft)
+
+    # Skip the zero frequency (infinite period)
+    periods = 1 / freqs[1:]
+    result = [_significant_periods(periods, pgram[1:]) for pgram in pgrams]
+    return result if x.ndim == 2 else result[0]
+
+
 def periodogram_nonequispaced(times, x, *, freqs=None,
                               period_low=None, period_high=None,
                               n_periods=1000, detrend='linear'):
@@ -246,101 +321,315 @@ def partial_autocorrelation(x, *args, nlags=None, method='ldb', **kwargs):
     return _significant_acf(corr, kwargs.get('alpha'))
 
 
-def interpolate_timeseries(data, method='linear', multivariate=False):
+INTERPOLATION_METHODS = ('linear', 'cubic', 'nearest', 'mean',
+                         'ffill', 'bfill', 'pchip', 'spline')
+
+
+def _closest_defined(isnan):
+    # Rows of the closest numbers before (lo) and after (hi) each cell of a
+    # 2d array; -1 and n if there is none
+    n = len(isnan)
+    rows = np.arange(n)[:, None]
+    lo = np.maximum.accumulate(np.where(isnan, -1, rows), axis=0)
+    hi = np.minimum.accumulate(np.where(isnan, n, rows)[::-1], axis=0)[::-1]
+    return lo, hi
+
+
+def _limit_gaps(A, orig, max_gap):
+    # Put nans back into runs of more than max_gap nans in orig
+    isnan = np.isnan(orig)
+    lo, hi = _closest_defined(isnan)
+    long = isnan & (hi - lo - 1 > max_gap)
+    if not long.any():
+        return A
+    A = A.copy()
+    A[long] = np.nan
+    return A
+
+
+def _gap_support(isnan, width):
+    # Rows of up to width numbers on each side of every gap in a column
+    defined = np.flatnonzero(~isnan)
+    gap_after = np.diff(defined, append=len(isnan)) > 1
+    gap_before = np.diff(defined, prepend=-1) > 1
+    ones = np.ones(width)
+    near = np.convolve(gap_after, ones)[width - 1:] \
+        + np.convolve(gap_before, ones)[:len(defined)]
+    return defined[near > 0]
+
+
+def _interpolate_discrete(col, x, method):
+    # Interpolate discrete columns to mode/nearest/previous/next value
+    isnan = np.isnan(col)
+    if not isnan.any():
+        return col
+    if method in ('ffill', 'bfill'):
+        return _interpolate_block(col[:, None], x, method)[:, 0]
+    col = col.copy()
+    if method == 'nearest':
+        from scipy.interpolate import interp1d
+        nonnan = ~isnan
+        f = interp1d(x[nonnan], col[nonnan], kind='nearest', copy=False,
+                     assume_sorted=True)
+        col[isnan] = f(x)[isnan]
+    else:
+        col[isnan] = np.argmax(np.bincount(col[~isnan].astype(int)))
+    return col
+
+
+def _interpolate_multivariate(A, variables, method, chunk_size=5000):
+    # Interpolate continuous columns together (2d, over positions in A).
+    # Rows are triangulated in windows of about chunk_size cells, with a
+    # quarter of the window's rows added on each side for context; nans that
+    # cannot be interpolated within a window are left for 1d interpolation
+    from scipy.interpolate import griddata
+    from scipy.spatial import QhullError
+
+    is_continuous = [var.is_continuous for var in variables]
+    if sum(is_continuous) < 3 or A.shape[0] < 3:
+        # griddata() doesn't work with 1d data
+        return A
+    Acont = A[:, is_continuous]
+    isnan = np.isnan(Acont)
+    if not isnan.any():
+        return A
+    n_rows, n_cols = Acont.shape
+    rows = max(chunk_size // n_cols, 3)
+    margin = rows // 4
+    for start in range(0, n_rows, rows):
+        end = min(start + rows, n_rows)
+        if not isnan[start:end].any():
+            continue
+        lo, hi = max(start - margin, 0), min(end + margin, n_rows)
+        nonnan = ~isnan[lo:hi]
+        targets = isnan[start:end].nonzero()
+        try:
+            values = griddata(nonnan.nonzero(), Acont[lo:hi][nonnan],
+                              (targets[0] + start - lo, targets[1]),
+                              method=method)
+        except (QhullError, ValueError):
+            # too few or collinear points
+            continue
+        Acont[start:end][targets] = values
+    A = A.copy()
+    A[:, is_continuous] = Acont
+    return A
+
+
+def _interpolate_1d(col, x, method):
+    from scipy.interpolate import interp1d
+
+    isnan = np.isnan(col)
+    # there is no need to interpolate if there are no nans
+    # there needs to be at least two numbers
+    if not isnan.any() or sum(~isnan) < 2:
+        return col
+    col = col.copy()
+
+    # Mean interpolation
+    if method == 'mean':
+        col[isnan] = np.nanmean(col)
+        return col
+
+    if method in ('ffill', 'bfill'):
+        return _interpolate_block(col[:, None], x, method)[:, 0]
+
+    if method in ('pchip', 'spline'):
+        from scipy.interpolate import PchipInterpolator, CubicSpline
+        # Fit only the numbers around gaps. Pchip on a gap depends on just
+        # two numbers on each side; the effect of farther numbers on a
+        # natural spline quickly decays
+        if method == 'pchip':
+            support = _gap_support(isnan, 2)
+            f = PchipInterpolator(x[support], col[support])
+        else:
+            support = _gap_support(isnan, 6)
+            f = CubicSpline(x[support], col[support], bc_type='natural')
+        # nans at the edges are filled with the first or the last number
+        col[isnan] = f(np.clip(x[isnan], x[support[0]], x[support[-1]]))
+        return col
+
+    nonnan = ~isnan
+    xnn, colnn = x[nonnan], col[nonnan]
+    f = interp1d(xnn, colnn, kind=method,
+                 copy=False, assume_sorted=True, bounds_error=False)
+    if method == "interpolate":
+        f.fill_value = "extrapolate"
+    else:
+        f.fill_value = (colnn[np.argmin(xnn)], colnn[np.argmax(xnn)])
+    col[isnan] = f(x[isnan])
+    return col
+
+
+def _interpolate_block(A, x, method):
+    # Interpolate all columns of A at once; same as _interpolate_1d on each
+    # column, but vectorized for linear, nearest, mean, ffill and bfill
+    if method not in ("linear", "nearest", "mean", "ffill", "bfill"):
+        return np.column_stack(
+            [_interpolate_1d(col, x, method) for col in A.T]
+            + [np.empty((len(A), 0))])
+    isnan = np.isnan(A)
+    # there is no need to interpolate if there are no nans
+    # there needs to be at least two numbers
+    cols = isnan.any(axis=0) & (len(A) - isnan.sum(axis=0) >= 2)
+    if not cols.any():
+        return A
+    B, isnan = A[:, cols], isnan[:, cols]
+    if method == "mean":
+        B[isnan] = np.broadcast_to(np.nanmean(B, axis=0), B.shape)[isnan]
+    else:
+        n = len(B)
+        lo, hi = _closest_defined(isnan)
+        i, j = isnan.nonzero()
+        lo, hi = lo[i, j], hi[i, j]
+        # nans at the edges are filled with the first or the last number
+        if method == "bfill":
+            values = B[np.where(hi < n, hi, lo), j]
+        else:
+            values = B[np.where(lo >= 0, lo, hi), j]
+        if method in ("linear", "nearest"):
+            inside = (lo >= 0) & (hi < n)
+            i, j, lo, hi = i[inside], j[inside], lo[inside], hi[inside]
+            xi, xlo, xhi = x[i], x[lo], x[hi]
+            ylo, yhi = B[lo, j], B[hi, j]
+            if method == "linear":
+                values[inside] = (yhi - ylo) / (xhi - xlo) * (xi - xlo) + ylo
+            else:
+                # the lower neighbour on ties, as in interp1d
+                values[inside] = np.where(xi > xlo / 2 + xhi / 2, yhi, ylo)
+        B[isnan] = values
+    A = A.copy()
+    A[:, cols] = B
+    return A
+
+
+def interpolate_columns(data, variables, method='linear', multivariate=False,
+                        cache=None, chunk_size=5000, max_gap=None):
+    """Return columns of variables with nan values interpolated.
+
+    Parameters
+    ----------
+    data : Timeseries
+        A table to interpolate.
+    variables : list of Variable or str
+        Attributes or class variables to interpolate. Values of meta
+        attributes are returned as they are.
+    method : str {'linear', 'cubic', 'nearest', 'mean', 'ffill', 'bfill',
+                  'pchip', 'spline'}
+        The interpolation method to use. 'ffill' and 'bfill' use the previous
+        and the next number, 'pchip' is a monotone piecewise cubic and
+        'spline' is a natural cubic spline.
+    multivariate : bool
+        Whether to perform multivariate (2d) interpolation first. Only
+        linear, cubic and nearest interpolation can be multivariate.
+    cache : dict, optional
+        Interpolated columns by variables. Only columns that are not in the
+        cache are computed and then added to it; multivariate interpolation
+        adds all continuous columns that are interpolated together.
+    chunk_size : int
+        The approximate number of cells (rows times continuous columns)
+        that multivariate interpolation triangulates at once.
+    max_gap : int, optional
+        If given, runs of more than max_gap consecutive missing values are
+        left missing.
+
+    Returns
+    -------
+    columns : list of np.ndarray
+        Interpolated columns in the order of variables.
+    """
+    assert method in INTERPOLATION_METHODS
+
+    if cache is None:
+        cache = {}
+    domain = data.domain
+    variables = [domain[var] for var in variables]
+    parts = {}
+    for var in variables:
+        if var in cache:
+            continue
+        if var in domain.metas:
+            cache[var] = data.get_column(var)
+            continue
+        if not parts:
+            parts["x"] = \
+                Timeseries.from_data_table(data).time_values.astype(float)
+            parts[domain.attributes] = data.X
+            parts[domain.class_vars] = np.column_stack((data.Y,))  # make 2d
+        x = parts["x"]
+        part = domain.attributes if var in domain.attributes \
+            else domain.class_vars
+        A = parts[part]
+        if var.is_discrete:
+            batch = [var]
+            col = _interpolate_discrete(A[:, part.index(var)], x, method)
+            interpolated = _interpolate_1d(col, x, method)[:, None]
+        else:
+            if multivariate and method in ('linear', 'cubic', 'nearest'):
+                batch = [part_var for part_var in part
+                         if part_var.is_continuous and part_var not in cache]
+                interpolated = \
+                    _interpolate_multivariate(A, part, method, chunk_size)
+            else:
+                batch = [part_var for part_var in variables
+                         if part_var in part and part_var.is_continuous
+                         and part_var not in cache]
+                interpolated = A
+            # Do the 1d interpolation anyway in case 2d left some nans
+            interpolated = _interpolate_block(
+                interpolated[:, [part.index(part_var) for part_var in batch]],
+                x, method)
+        if max_gap is not None:
+            interpolated = _limit_gaps(
+                interpolated,
+                A[:, [part.index(part_var) for part_var in batch]], max_gap)
+        cache.update(zip(batch, interpolated.T))
+    return [cache[var] for var in variables]
+
+
+def interpolate_timeseries(data, method='linear', multivariate=False,
+                           cache=None, chunk_size=5000, max_gap=None):
     """Return a new Timeseries (Table) with nan values interpolated.
 
     Parameters
     ----------
     data : Orange.data.Table
         A table to interpolate.
-    method : str {'linear', 'cubic', 'nearest', 'mean'}
-        The interpolation method to use.
+    method : str {'linear', 'cubic', 'nearest', 'mean', 'ffill', 'bfill',
+                  'pchip', 'spline'}
+        The interpolation method to use; see `interpolate_columns`.
     multivariate : bool
         Whether to perform multivariate (2d) interpolation first.
         Univariate interpolation of same method is always performed as a
         final step.
+    cache : dict, optional
+        Interpolated columns by variables, as in `interpolate_columns`.
+    chunk_size : int
+        The approximate number of cells that multivariate interpolation
+        triangulates at once, as in `interpolate_columns`.
+    max_gap : int, optional
+        If given, runs of more than max_gap consecutive missing values are
+        left missing.
 
     Returns
     -------
     series : Timeseries
         A table with nans in original replaced with interpolated values.
     """
-    from scipy.interpolate import griddata, interp1d
     from Orange.data import Domain
-    from orangecontrib.timeseries import Timeseries
-
-    assert method in ("linear", "cubic", "mean", "nearest")
 
     attrs = data.domain.attributes
     cvars = data.domain.class_vars
     metas = data.domain.metas
-    X = data.X.copy()
-    Y = np.column_stack((data.Y,)).copy()  # make 2d
+    X, Y = (np.empty((len(data), len(variables)))
+            for variables in (attrs, cvars))
+    for A, variables in ((X, attrs), (Y, cvars)):
+        for i, col in enumerate(interpolate_columns(
+                data, variables, method, multivariate, cache, chunk_size,
+                max_gap)):
+            A[:, i] = col
     M = data.metas.copy()
 
-    # Interpolate discrete columns to mode/nearest value
-    _x = Timeseries.from_data_table(data).time_values.astype(float)
-    for A, vars in ((X, attrs),
-                    (Y, cvars)):
-        for i, var in enumerate(vars):
-            if not var.is_discrete:
-                continue
-            vals = A[:, i]
-            isnan = np.isnan(vals)
-            if not isnan.any():
-                continue
-            if method == 'nearest':
-                nonnan = ~isnan
-                x, vals = _x[nonnan], vals[nonnan]
-                f = interp1d(x, vals, kind='nearest', copy=False, assume_sorted=True)
-                A[isnan, i] = f(_x)[isnan]
-                continue
-            A[isnan, i] = np.argmax(np.bincount(vals[~isnan].astype(int)))
-
-    # Interpolate data
-    if multivariate and method != 'mean':
-        for A, vars in ((X, attrs),
-                        (Y, cvars)):
-            is_continuous = [var.is_continuous for var in vars]
-            if sum(is_continuous) < 3 or A.shape[0] < 3:
-                # griddata() doesn't work with 1d data
-                continue
-
-            # Only multivariate continuous features
-            Acont = A[:, is_continuous]
-            isnan = np.isnan(Acont)
-            if not isnan.any():
-                continue
-            nonnan = ~isnan
-            vals = griddata(nonnan.nonzero(), Acont[nonnan], isnan.nonzero(),
-                            method=method)
-            Acont[isnan] = vals
-            A[:, is_continuous] = Acont
-
-    # Do the 1d interpolation anyway in case 2d left some nans
-    for A in (X, Y):
-        for i, col in enumerate(A.T):
-            isnan = np.isnan(col)
-            # there is no need to interpolate if there are no nans
-            # there needs to be at least two numbers
-            if not isnan.any() or sum(~isnan) < 2:
-                continue
-
-            # Mean interpolation
-            if method == 'mean':
-                A[isnan, i] = np.nanmean(col)
-                continue
-
-            nonnan = ~isnan
-            xnn, colnn = _x[nonnan], col[nonnan]
-            f = interp1d(xnn, colnn, kind=method,
-                         copy=False, assume_sorted=True, bounds_error=False)
-            if method == "interpolate":
-                f.fill_value = "extrapolate"
-            else:
-                f.fill_value = (colnn[np.argmin(xnn)], colnn[np.argmax(xnn)])
-            A[isnan, i] = f(_x[isnan])
-
     ts = Timeseries.from_numpy(Domain(attrs, cvars, metas), X, Y, M)
     return ts
 
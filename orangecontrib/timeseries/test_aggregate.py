@@ -1,13 +1,33 @@
+import calendar
+import os
+import sys
 import unittest
+from importlib.util import find_spec
+from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
 import numpy as np
+from Orange.data import Domain, TimeVariable, ContinuousVariable
+from Orange.util import utc_from_timestamp
+from scipy import stats
+
+from orangecontrib.timeseries import Timeseries
 
 from orangecontrib.timeseries.aggregate import moving_sum, \
     windowed_func, moving_count_nonzero, moving_count_defined, _windowed, \
     windowed_span, _windowed_weighted, windowed_linear_MA, \
     windowed_exponential_MA, windowed_cumsum, windowed_cumprod, windowed_mode, \
-    windowed_harmonic_mean, AggOptions
+    windowed_harmonic_mean, AggOptions, moving_min, moving_max, \
+    moving_quantile, moving_median, moving_mean, moving_var, moving_std, \
+    recursive_exponential_MA, windowed_kernel_MA, windowed_triangular_MA, \
+    windowed_gaussian_MA, windowed_hann_MA, _moving_mode_counts, \
+    _moving_mode_sorted, _moving_mode_histogram, windowed_geometric_mean, \
+    moving_statistics, MOVING_STATISTICS, PeriodOptions, time_blocks, \
+    group_offsets, aggregate_groups, time_windows, aggregate_ranges, \
+    range_quantile, range_mode, get_backend, set_backend, \
+    aggregate_chunked, run_jobs, apply_aggregations, range_statistics, \
+    multi_width_statistics, moving_skew, moving_kurtosis, range_skew, \
+    range_kurtosis
 
 
 class TestMovingTransform(unittest.TestCase):
@@ -159,6 +179,149 @@ class TestMovingTransform(unittest.TestCase):
         np.testing.assert_equal(windowed_span(a, 3, 1),
                                 np.array([5, 4, 2, 2, 4, 2]))
 
+    def test_moving_min_max(self):
+        a = np.array([3, 8, np.nan, 4, 2, np.nan, np.nan, np.nan, 1, 9, 4])
+        np.testing.assert_equal(moving_min(a, 3),
+                                [3, 4, 2, 2, 2, np.nan, 1, 1, 1])
+        np.testing.assert_equal(moving_max(a, 3),
+                                [8, 8, 4, 4, 2, np.nan, 1, 9, 9])
+        np.testing.assert_equal(moving_max(a, 3, 2),
+                                [8, 4, 2, 1, 9])
+        np.testing.assert_equal(moving_min(a, 4, 4), [3, 2])
+        np.testing.assert_equal(moving_max(a, 11), [9])
+        np.testing.assert_equal(moving_max(a, 12), [])
+
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=200)
+        x[rgen.random(200) < 0.3] = np.nan
+        for width in (1, 2, 7, 50, 200):
+            for shift in (1, 3, width):
+                windows = _windowed(x, width, shift)
+                defined = ~np.all(np.isnan(windows), axis=1)
+                exp_min = np.full(len(windows), np.nan)
+                exp_min[defined] = np.nanmin(windows[defined], axis=1)
+                exp_max = np.full(len(windows), np.nan)
+                exp_max[defined] = np.nanmax(windows[defined], axis=1)
+                np.testing.assert_equal(moving_min(x, width, shift), exp_min)
+                np.testing.assert_equal(moving_max(x, width, shift), exp_max)
+
+    def test_moving_quantile(self):
+        a = np.array([3, 8, np.nan, 4, 2, np.nan, np.nan, np.nan, 1, 9, 4])
+        np.testing.assert_equal(moving_median(a, 3),
+                                [5.5, 6, 3, 3, 2, np.nan, 1, 5, 4])
+        np.testing.assert_equal(moving_median(a, 3, 2),
+                                [5.5, 3, 2, 1, 4])
+        np.testing.assert_equal(moving_quantile(a, 4, 4, 0.25), [3.5, 2])
+        np.testing.assert_equal(moving_median(a, 12), [])
+
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=200)
+        x[rgen.random(200) < 0.3] = np.nan
+        x[::10] = 1  # add some ties
+        for width in (1, 2, 7, 50, 200):
+            for shift in (1, 3, width):
+                windows = _windowed(x, width, shift)
+                defined = ~np.all(np.isnan(windows), axis=1)
+                for q in (0, 0.25, 0.5, 0.9, 1):
+                    exp = np.full(len(windows), np.nan)
+                    exp[defined] = np.nanquantile(windows[defined], q, axis=1)
+                    np.testing.assert_almost_equal(
+                        moving_quantile(x, width, shift, q), exp)
+
+    def test_moving_moments(self):
+        a = np.array([3, 8, np.nan, 4, 2, np.nan, np.nan, np.nan, 1, 9, 4])
+        np.testing.assert_almost_equal(
+            moving_mean(a, 3), [5.5, 6, 3, 3, 2, np.nan, 1, 5, 14 / 3])
+        np.testing.assert_almost_equal(
+            moving_var(a, 3), [6.25, 4, 1, 1, 0, np.nan, 0, 16, 98 / 9])
+        np.testing.assert_almost_equal(
+            moving_std(a, 3, 2), [2.5, 1, 0, 0, np.sqrt(98 / 9)])
+        np.testing.assert_equal(moving_mean(a, 12), [])
+
+        # Large offset must not cause catastrophic cancellation
+        rgen = np.random.default_rng(42)
+        x = 1e9 + rgen.normal(size=1000)
+        x[rgen.random(1000) < 0.2] = np.nan
+        for width in (2, 7, 100):
+            for shift in (1, width):
+                windows = _windowed(x, width, shift)
+                defined = ~np.all(np.isnan(windows), axis=1)
+                exp_mean = np.full(len(windows), np.nan)
+                exp_mean[defined] = np.nanmean(windows[defined], axis=1)
+                exp_var = np.full(len(windows), np.nan)
+                exp_var[defined] = np.nanvar(windows[defined], axis=1)
+                np.testing.assert_allclose(
+                    moving_mean(x, width, shift), exp_mean, rtol=1e-14)
+                np.testing.assert_allclose(
+                    moving_var(x, width, shift), exp_var, atol=1e-6)
+
+        # ... and neither must a trend or a random walk
+        trend = np.arange(1e6) + rgen.normal(size=1000000)
+        np.testing.assert_allclose(
+            moving_var(trend, 5), np.var(_windowed(trend, 5, 1), axis=1),
+            rtol=1e-9)
+        walk = np.cumsum(rgen.normal(size=(20000, 2)), axis=0) * 1000
+        walk[rgen.random(walk.shape) < 0.2] = np.nan
+        walk[5000:5500, 0] = 1e9
+        for width, shift in ((5, 1), (100, 3)):
+            windows = _windowed(walk, width, shift)
+            np.testing.assert_allclose(
+                moving_mean(walk, width, shift),
+                np.nanmean(windows, axis=1), rtol=1e-12)
+            np.testing.assert_allclose(
+                moving_var(walk, width, shift),
+                np.nanvar(windows, axis=1), rtol=1e-9)
+
+    def test_moving_skew_kurtosis(self):
+        def expected(func, x, width, shift):
+            return np.array(
+                [[func(col[~np.isnan(col)]) if np.sum(~np.isnan(col)) > 1
+                  else np.nan for col in window.T]
+                 for window in _windowed(x, width, shift)])
+
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(200, 2))
+        x[rgen.random(x.shape) < 0.3] = np.nan
+        x[50:60] = np.nan
+        # a trend, a jump and constant windows
+        x[:, 1] += np.arange(200) * 100
+        x[100:130, 0] = 1000
+        for width, shift in ((2, 1), (5, 1), (12, 1), (30, 7), (5, 5)):
+            for func, kernel in ((stats.skew, moving_skew),
+                                 (stats.kurtosis, moving_kurtosis)):
+                exp = expected(func, x, width, shift)
+                np.testing.assert_allclose(
+                    kernel(x, width, shift), exp, atol=1e-6)
+                np.testing.assert_allclose(
+                    kernel(x[:, 1], width, shift), exp[:, 1], atol=1e-6)
+        self.assertEqual(moving_skew(x, 201, 1).shape, (0, 2))
+
+    def test_moving_statistics(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(300, 3))
+        x[rgen.random((300, 3)) < 0.3] = np.nan
+        x[:20, 1] = np.nan
+        x[5, 2] = np.inf
+        # a trend must not cause cancellation in the fused moments
+        x[:, 0] += np.arange(300) * 1e6
+        for width in (1, 7, 50, 400):
+            for shift in (1, 3, width):
+                res = moving_statistics(x, width, shift)
+                self.assertEqual(tuple(res), MOVING_STATISTICS)
+                for name, values in res.items():
+                    np.testing.assert_equal(
+                        values, AggOptions[name].transform(x, width, shift),
+                        err_msg=name)
+                windows = _windowed(x[:, 0], width, shift)
+                np.testing.assert_allclose(
+                    res["var"][:, 0], np.nanvar(windows, axis=1),
+                    rtol=1e-9, atol=1e-12)
+
+        res = moving_statistics(x, 7, 3, ("span", "mean"))
+        self.assertEqual(list(res), ["span", "mean"])
+        np.testing.assert_equal(res["span"], windowed_span(x, 7, 3))
+        np.testing.assert_equal(res["mean"], moving_mean(x, 7, 3))
+
     def test_windowed_weighted(self):
         a = np.array([3, 8, 6, 4, 2, 4, 6, 8])
         np.testing.assert_equal(
@@ -170,6 +333,88 @@ class TestMovingTransform(unittest.TestCase):
             _windowed_weighted(a, np.array([1, 0, -2]), 1),
             np.array([3 - 12, -4, -6, 4 - 8, -6, 4 - 16]))
 
+    def test_windowed_weighted_long(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=3000)
+        weights = rgen.random(500)
+        windows = _windowed(x, 500, 7)
+        np.testing.assert_almost_equal(
+            _windowed_weighted(x, weights, 7), windows @ weights)
+
+        x[rgen.random(3000) < 0.5] = np.nan
+        x[1000:1600] = np.nan
+        defined = ~np.isnan(windows)
+        weightsums = defined @ weights / np.sum(weights)
+        exp = np.nansum(windows * weights, axis=1) / weightsums
+        exp[~np.any(defined, axis=1)] = np.nan
+        np.testing.assert_almost_equal(
+            _windowed_weighted(x, weights, 7), exp)
+        self.assertEqual(len(_windowed_weighted(x[:5], weights[:10], 1)), 0)
+
+        # rounding errors from a spike must not spread to other windows
+        x = rgen.normal(size=100000)
+        x[1000] = 1e12
+        for width in (20, 500):
+            windows = _windowed(x, width, 1)
+            res = _windowed_weighted(x, weights[:width], 1)
+            np.testing.assert_allclose(
+                res[1001:], windows[1001:] @ weights[:width], atol=1e-10)
+            np.testing.assert_allclose(
+                res[:1000 - width], windows[:1000 - width] @ weights[:width],
+                atol=1e-10)
+
+    def test_windowed_weighted_inf(self):
+        x = np.arange(30, dtype=float)
+        x[10] = np.inf
+        x[20] = -np.inf
+        weights = np.arange(1, 8, dtype=float)
+        for width in (7, 300):
+            w = np.resize(weights, width)
+            y = np.tile(x, 20)
+            windows = _windowed(y, width, 1)
+            finite = np.isfinite(windows)
+            exp = np.where(finite, windows, 0) @ w
+            positive = np.any(windows == np.inf, axis=1)
+            negative = np.any(windows == -np.inf, axis=1)
+            exp[positive] = np.inf
+            exp[negative] = -np.inf
+            exp[positive & negative] = np.nan
+            np.testing.assert_allclose(
+                _windowed_weighted(y, w, 1), exp, atol=1e-8)
+            desc = AggOptions["lin. MA"]
+            np.testing.assert_equal(
+                aggregate_chunked(y, desc, width, 3, chunk_size=97),
+                desc.transform(y, width, 3))
+        np.testing.assert_almost_equal(
+            windowed_linear_MA(x, 7, 1)[:14],
+            [4, 5, 6, 7] + [np.inf] * 7 + [15, 16, 17])
+
+        x[3] = np.nan
+        res = windowed_linear_MA(x, 7, 1)
+        np.testing.assert_equal(res[4:11], np.inf)
+        np.testing.assert_equal(res[14:21], -np.inf)
+        self.assertFalse(np.any(np.isnan(res)))
+
+    def test_windowed_kernel_MA(self):
+        a = np.array([1, 2, 3, 8, 5])
+        np.testing.assert_almost_equal(
+            windowed_kernel_MA(a, [1, 2, 3]), windowed_linear_MA(a, 3, 1))
+        np.testing.assert_almost_equal(
+            windowed_kernel_MA(a, [1, 2, 3], 2),
+            windowed_linear_MA(a, 3, 1)[::2])
+
+        a = np.array([1, 2, 3, np.nan, 5, 4, 2, 6])
+        np.testing.assert_almost_equal(
+            windowed_triangular_MA(a, 3, 1),
+            [(1 + 2 * 2 + 3) / 4, (2 + 2 * 3) / 3, (3 + 5) / 2,
+             (2 * 5 + 4) / 3, (5 + 2 * 4 + 2) / 4, (4 + 2 * 2 + 6) / 4])
+        for ma in (windowed_triangular_MA, windowed_gaussian_MA,
+                   windowed_hann_MA):
+            np.testing.assert_almost_equal(ma(np.full(10, 3.), 4, 1), 3)
+            # symmetric kernels, so the result for a reversed series
+            # is reversed
+            np.testing.assert_almost_equal(ma(a, 4, 1), ma(a[::-1], 4, 1)[::-1])
+
     @patch("orangecontrib.timeseries.aggregate._windowed_weighted")
     def test_windowed_MA(self, ww):
         a = np.array([3, 8, 6, 4, 2, 4, 6, 8])
@@ -219,12 +464,68 @@ class TestMovingTransform(unittest.TestCase):
         np.testing.assert_equal(windowed_mode(a, 3, 1),
                                 [3, 2, 2, 2, 2, 2, np.nan])
 
+    def test_windowed_mode_engines(self):
+        def mode(windows):
+            modes = np.full(len(windows), np.nan)
+            for i, window in enumerate(windows):
+                window = window[~np.isnan(window)]
+                if window.size:
+                    values, counts = np.unique(window, return_counts=True)
+                    modes[i] = values[np.argmax(counts)]
+            return modes
+
+        rgen = np.random.default_rng(42)
+        for nvalues in (3, 100):
+            x = rgen.integers(0, nvalues, 300).astype(float)
+            x[rgen.random(300) < 0.3] = np.nan
+            x[100:110] = np.nan
+            values = np.unique(x[~np.isnan(x)])
+            for width in (1, 2, 5, 50, 300):
+                for shift in (1, 3, width):
+                    exp = mode(_windowed(x, width, shift))
+                    np.testing.assert_equal(
+                        windowed_mode(x, width, shift), exp)
+                    np.testing.assert_equal(
+                        _moving_mode_counts(x, values, width, shift), exp)
+                    np.testing.assert_equal(
+                        _moving_mode_sorted(x, width, shift, 100), exp)
+                    np.testing.assert_equal(
+                        _moving_mode_histogram(x, width, shift), exp)
+        np.testing.assert_equal(windowed_mode(x, 301, 1), [])
+
     def test_windowed_harmonic_mean(self):
         a = np.array([3, 3, 2, 2, 2, 0, 0, 0, 1, 2, 3, np.nan, np.nan, np.nan])
         np.testing.assert_almost_equal(
             windowed_harmonic_mean(a, 3, 1),
             [2.5714286, 2.25, 2, 0, 0, 0, 0, 0, 1.63636363, np.nan, np.nan, np.nan])
 
+    def test_windowed_geometric_mean(self):
+        a = np.array([3, 3, 2, 2, 2, 0, 0, 0, 1, 2, 4, np.nan, -1, 2, 2, 2])
+        np.testing.assert_almost_equal(
+            windowed_geometric_mean(a, 3, 1),
+            [18 ** (1 / 3), 12 ** (1 / 3), 2, 0, 0, 0, 0, 0, 2,
+             np.nan, np.nan, np.nan, np.nan, 2])
+        np.testing.assert_almost_equal(
+            windowed_geometric_mean(a, 3, 3),
+            [18 ** (1 / 3), 0, 0, np.nan, np.nan])
+        np.testing.assert_equal(windowed_geometric_mean(a, 17, 1), [])
+
+    def test_moving_power_mean_precision(self):
+        # a tiny value must not affect the precision of later windows
+        a = np.array([1e-12, 1, 2, 3, 4, 5, 6])
+        np.testing.assert_allclose(
+            windowed_harmonic_mean(a, 2, 1)[1:],
+            [2 / (1 + 1 / 2), 2 / (1 / 2 + 1 / 3), 2 / (1 / 3 + 1 / 4),
+             2 / (1 / 4 + 1 / 5), 2 / (1 / 5 + 1 / 6)], rtol=1e-15)
+
+        rgen = np.random.default_rng(42)
+        x = rgen.random(100)
+        for width in (1, 3, 10, 100):
+            for shift in (1, 4, width):
+                np.testing.assert_almost_equal(
+                    moving_sum(x, width, shift),
+                    np.sum(_windowed(x, width, shift), axis=1))
+
     def test_windowed_linear_MA(self):
         a = np.array([1, 2, 3, 8, 5])
         np.testing.assert_almost_equal(
@@ -254,6 +555,34 @@ class TestMovingTransform(unittest.TestCase):
             windowed_exponential_MA(a, 3, 1),
             [2.4285714, 3.4285714, 4.4285714])
 
+    def test_recursive_exponential_MA(self):
+        a = np.array([1, 2, 3, 4, 5])
+        # alpha = 0.5; weights of past values are 1, 1/2, 1/4, ...
+        np.testing.assert_almost_equal(
+            recursive_exponential_MA(a, 3),
+            [(3 + 2 / 2 + 1 / 4) / 1.75,
+             (4 + 3 / 2 + 2 / 4 + 1 / 8) / 1.875,
+             (5 + 4 / 2 + 3 / 4 + 2 / 8 + 1 / 16) / 1.9375])
+        np.testing.assert_almost_equal(
+            recursive_exponential_MA(a, 3, 2),
+            [(3 + 2 / 2 + 1 / 4) / 1.75,
+             (5 + 4 / 2 + 3 / 4 + 2 / 8 + 1 / 16) / 1.9375])
+        np.testing.assert_equal(recursive_exponential_MA(a, 6), [])
+
+        a = np.array([np.nan, np.nan, np.nan, 4, np.nan, 6])
+        np.testing.assert_almost_equal(
+            recursive_exponential_MA(a, 3),
+            [np.nan, 4, 4, (6 + 4 / 4) / 1.25])
+
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=100)
+        x[rgen.random(100) < 0.3] = np.nan
+        weights = 0.8 ** np.arange(99, -1, -1)
+        exp = [np.nansum(x[:i] * weights[-i:])
+               / np.sum(weights[-i:][~np.isnan(x[:i])])
+               for i in range(9, 101)]
+        np.testing.assert_almost_equal(recursive_exponential_MA(x, 9), exp)
+
 
 class AggFuncsTest(unittest.TestCase):
     def test_sliding(self):
@@ -268,6 +597,8 @@ class AggFuncsTest(unittest.TestCase):
                 ("max", [8, 8, 8, 8, 6, 4, 3, 3]),
                 ("span", [6, 6, 4, 6, 4, 2, 4, 4]),
                 ("median", [6, 6.5, 6.5, 5, 3.5, 3, 2, 0]),
+                ("q1", [4.25, 5, 5.5, 3.5, 2.75, 2.5, 0.5, -0.5]),
+                ("q3", [7.25, 7.25, 7.25, 6.5, 4.5, 3.5, 2.5, 1.5]),
                 ("std", [2.2912878, 2.2776084, 1.4790199, 2.236068 , 1.4790199, 0.8164966, 1.6996732, 1.6996732]),
                 ("var", [5.25, 5.1875, 2.1875, 5, 2.1875, 0.6666667, 2.8888889, 2.8888889]),
                 ("lin. MA", [(4 * 8 + 3 * 7 + 2 * 2 + 1 * 5) / 10,
@@ -304,6 +635,347 @@ class AggFuncsTest(unittest.TestCase):
         np.testing.assert_equal(mode.block_transform(x[4:8]), 1)
         np.testing.assert_equal(mode.block_transform(x[8:12]), 0)
 
+    def test_aggregators(self):
+        rgen = np.random.default_rng(42)
+        x = np.abs(rgen.normal(size=(100, 2))) + 0.1
+        x[rgen.random(x.shape) < 0.2] = np.nan
+        for desc in AggOptions.values():
+            for width, shift in ((5, 1), (5, 3), (7, 7), (4, 9), (150, 1)):
+                msg = f"in function {desc.short_desc}"
+                full = desc.transform(x, width, shift)
+                for chunks in ((3, 50, 51, 100), (0, 1, 2, 3, 4, 70, 100)):
+                    aggregator = desc.make_aggregator(width, shift)
+                    aggregator.init(x[:chunks[0]])
+                    res = np.concatenate(
+                        [full[:0]] + [aggregator.update(x[start:end])
+                                      for start, end in zip(chunks,
+                                                            chunks[1:])])
+                    ninit = 0 if chunks[0] < width \
+                        else 1 + (chunks[0] - width) // shift
+                    np.testing.assert_equal(res, full[ninit:], err_msg=msg)
+
+    def test_aggregate_chunked(self):
+        rgen = np.random.default_rng(42)
+        with TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "x.npy")
+            x = np.lib.format.open_memmap(fname, "w+", shape=(300, 2))
+            x[:] = np.abs(rgen.normal(size=(300, 2))) + 0.1
+            x[:, 1] += np.arange(300) * 1e3
+            x[rgen.random(x.shape) < 0.2] = np.nan
+            for desc in AggOptions.values():
+                msg = f"in function {desc.short_desc}"
+                for width, shift in ((5, 1), (7, 3), (4, 6), (150, 1),
+                                     (400, 1)):
+                    full = desc.transform(np.array(x), width, shift)
+                    for chunk_size in (1, 13, 64, 1000):
+                        res = aggregate_chunked(
+                            x, desc, width, shift, chunk_size=chunk_size)
+                        np.testing.assert_equal(res, full, err_msg=msg)
+
+            out = np.lib.format.open_memmap(
+                os.path.join(tmpdir, "out.npy"), "w+", shape=(294, 2))
+            column = out[:, 0]
+            res = aggregate_chunked(x[:, 1], AggOptions["max"], 7, 1,
+                                    out=column, chunk_size=10)
+            self.assertIs(res, column)
+            np.testing.assert_equal(
+                out[:, 0], AggOptions["max"].transform(x[:, 1], 7, 1))
+            self.assertRaises(ValueError, aggregate_chunked,
+                              x, AggOptions["max"], 7, out=column)
+            del x, out, column, res
+
+    def test_aggregator_buffer(self):
+        # kept rows do not grow with lcm(width, shift)
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=100000) + np.arange(100000) * 1e3
+        x[rgen.random(len(x)) < 0.1] = np.nan
+        width, shift = 1000, 999
+        for name in ("mean", "lin. MA", "median", "max"):
+            desc = AggOptions[name]
+            aggregator = desc.make_aggregator(width, shift)
+            res = []
+            for start in range(0, len(x), 10000):
+                res.append(aggregator.update(x[start:start + 10000]))
+                self.assertLess(len(aggregator._buffer), 2 * width)
+            np.testing.assert_equal(np.concatenate(res),
+                                    desc.transform(x, width, shift),
+                                    err_msg=name)
+
+    def test_run_jobs(self):
+        jobs = [lambda i=i: i * i for i in range(20)]
+        for n_jobs in (None, 1, 4, 50):
+            self.assertEqual(run_jobs(jobs, n_jobs),
+                             [i * i for i in range(20)])
+        self.assertEqual(run_jobs([], 4), [])
+
+    def test_apply_aggregations(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(50, 3))
+        data = Timeseries.from_numpy(
+            Domain([ContinuousVariable(f"x{i}") for i in range(3)]), x)
+        spec = [("x0", "mean"), (data.domain["x2"], "max"), ("x0", "median"),
+                ("x1", "mean")]
+        for n_jobs in (1, 3):
+            res = apply_aggregations(data, spec, 5, 2, n_jobs=n_jobs)
+            self.assertEqual(res.shape, (23, 4))
+            for column, (var, name) in zip(res.T, spec):
+                np.testing.assert_equal(
+                    column, AggOptions[name].transform(
+                        data.get_column(var), 5, 2))
+        self.assertEqual(apply_aggregations(data, [], 5, 2).shape, (23, 0))
+
+    def test_sliding_2d(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.integers(-2, 10, (50, 4)).astype(float)
+        x[rgen.random(x.shape) < 0.2] = np.nan
+        x[:, 3] = np.nan
+        for desc in AggOptions.values():
+            for width, shift in ((1, 1), (4, 1), (4, 3), (7, 7), (50, 1), (51, 1)):
+                msg = f"in function {desc.short_desc}"
+                res = desc.transform(x, width, shift)
+                self.assertEqual(
+                    res.shape, (max(0, 1 + (50 - width) // shift), 4), msg)
+                for i, col in enumerate(x.T):
+                    np.testing.assert_almost_equal(
+                        res[:, i], desc.transform(col, width, shift),
+                        err_msg=msg)
+            if desc.cumulative:
+                np.testing.assert_equal(
+                    desc.cumulative(x),
+                    np.column_stack([desc.cumulative(col) for col in x.T]))
+
+
+class GroupAggregationTest(unittest.TestCase):
+    def test_group_offsets(self):
+        order, offsets = group_offsets(np.array([2, 0, 2, 3, 0, 2]), 5)
+        np.testing.assert_equal(order, [1, 4, 0, 2, 5, 3])
+        np.testing.assert_equal(offsets, [0, 2, 2, 5, 6, 6])
+
+    def test_aggregate_groups(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(500, 2))
+        x[rgen.random(x.shape) < 0.3] = np.nan
+        x[:, 1] = np.round(x[:, 1])
+        x[7, 0] = np.inf
+        indices = rgen.integers(0, 40, 500)
+        indices[indices == 7] = 8  # empty group
+        x[indices == 3] = np.nan  # group without defined values
+        order, offsets = group_offsets(indices, 42)
+        for desc in AggOptions.values():
+            if desc.block_transform is None:
+                continue
+            msg = f"in function {desc.short_desc}"
+            xx = np.abs(x) + 0.1 \
+                if desc.short_desc in ("harmonic", "geometric") else x
+            exp = np.full((42, 2), np.nan)
+            for i in range(42):
+                if np.any(indices == i):
+                    exp[i] = [desc.block_transform(col)
+                              for col in xx[indices == i].T]
+            np.testing.assert_allclose(
+                aggregate_groups(xx, order, offsets, desc), exp,
+                rtol=1e-12, atol=1e-12, err_msg=msg)
+            np.testing.assert_allclose(
+                aggregate_groups(xx[:, 0], order, offsets, desc), exp[:, 0],
+                rtol=1e-12, atol=1e-12, err_msg=msg)
+
+
+class TimeWindowsTest(unittest.TestCase):
+    def test_time_windows(self):
+        starts, ends = time_windows(np.array([1, 2, 2.5, 2.75, 3, 5]), 1)
+        np.testing.assert_equal(starts, [0, 1, 1, 1, 2, 5])
+        np.testing.assert_equal(ends, [1, 2, 3, 4, 5, 6])
+
+    def test_range_statistics(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(150, 2))
+        x[rgen.random(x.shape) < 0.3] = np.nan
+        x[5, 0] = np.inf
+        starts, ends = time_windows(np.cumsum(rgen.exponential(1, 150)), 5)
+        res = range_statistics(x, starts, ends)
+        self.assertEqual(list(res), list(MOVING_STATISTICS))
+        for name, values in res.items():
+            np.testing.assert_equal(values, aggregate_ranges(
+                x, starts, ends, AggOptions[name]), err_msg=name)
+        res = range_statistics(x, starts, ends, ("max", "mean"))
+        self.assertEqual(list(res), ["max", "mean"])
+
+    def test_multi_width_statistics(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(150, 2))
+        x[:, 1] += np.arange(150) * 1e6
+        x[rgen.random(x.shape) < 0.3] = np.nan
+        widths = (1, 5, 60, 200)
+        res = multi_width_statistics(x, widths)
+        self.assertEqual(len(res), 4)
+        for width, width_res in zip(widths, res):
+            for name, values in width_res.items():
+                np.testing.assert_allclose(
+                    values, AggOptions[name].transform(x, width, 1),
+                    rtol=1e-9, atol=1e-12, err_msg=name)
+
+    def test_aggregate_ranges(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(150, 2))
+        x[rgen.random(x.shape) < 0.3] = np.nan
+        x[50:80] = np.nan
+        times = np.cumsum(rgen.exponential(10, 150))
+        for duration in (1, 30, 1e5):
+            starts, ends = time_windows(times, duration)
+            for desc in AggOptions.values():
+                if desc.block_transform is None:
+                    continue
+                msg = f"in function {desc.short_desc}"
+                xx = np.abs(x) + 0.1 \
+                    if desc.short_desc in ("harmonic", "geometric") else x
+                exp = np.array([[desc.block_transform(col)
+                                 for col in xx[start:end].T]
+                                for start, end in zip(starts, ends)])
+                np.testing.assert_allclose(
+                    aggregate_ranges(xx, starts, ends, desc), exp,
+                    rtol=1e-9, atol=1e-6, err_msg=msg)
+                np.testing.assert_allclose(
+                    aggregate_ranges(xx[:, 1], starts, ends, desc), exp[:, 1],
+                    rtol=1e-9, atol=1e-6, err_msg=msg)
+
+        starts, ends = np.array([0, 2, 1]), np.array([3, 2, 4])
+        np.testing.assert_equal(
+            aggregate_ranges(np.arange(5.), starts, ends, AggOptions["max"]),
+            [2, np.nan, 3])
+
+    def test_range_skew_kurtosis(self):
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(size=(300, 2))
+        x[:, 1] += np.arange(300) * 1e6
+        x[rgen.random(x.shape) < 0.2] = np.nan
+        starts, ends = time_windows(np.cumsum(rgen.exponential(1, 300)), 20)
+        for name, func in (("skew", range_skew),
+                           ("kurtosis", range_kurtosis)):
+            desc = AggOptions[name]
+            self.assertIs(desc.range_transform, func)
+            exp = np.array([[desc.block_transform(col)
+                             for col in x[start:end].T]
+                            for start, end in zip(starts, ends)])
+            np.testing.assert_allclose(
+                func(x, starts, ends), exp, rtol=1e-6, atol=1e-9,
+                err_msg=name)
+            # windows of a single width are the same as moving windows
+            width_ends = np.arange(7, 301)
+            np.testing.assert_allclose(
+                func(x, width_ends - 7, width_ends), desc.transform(x, 7, 1),
+                rtol=1e-6, atol=1e-9, err_msg=name)
+
+    def test_aggregate_ranges_power_means(self):
+        # windows with negative or missing values give nan, like in
+        # moving transforms, instead of raising errors in scipy.stats
+        def expected(windows):
+            return np.array([
+                [np.nan if np.any(~(col >= 0)) else
+                 0 if np.any(col == 0) else desc.block_transform(col)
+                 for col in window.T]
+                for window in windows])
+
+        rgen = np.random.default_rng(42)
+        x = rgen.normal(3, 1, size=(150, 2))
+        x[rgen.random(x.shape) < 0.02] = np.nan
+        x[rgen.random(x.shape) < 0.02] = -1
+        x[10, 0] = 0
+        starts, ends = time_windows(np.cumsum(rgen.exponential(1, 150)), 3)
+        indices = rgen.integers(0, 40, 150)
+        order, offsets = group_offsets(indices, 40)
+        for name in ("harmonic", "geometric"):
+            desc = AggOptions[name]
+            exp = expected(x[start:end] for start, end in zip(starts, ends))
+            self.assertTrue(np.any(np.isnan(exp)))
+            self.assertTrue(np.any(exp == 0))
+            np.testing.assert_allclose(
+                aggregate_ranges(x, starts, ends, desc), exp, err_msg=name)
+            exp = expected(x[indices == i] for i in range(40))
+            self.assertTrue(np.any(np.isnan(exp)))
+            np.testing.assert_allclose(
+                aggregate_groups(x, order, offsets, desc), exp, err_msg=name)
+
+
+class BackendTest(unittest.TestCase):
+    def test_set_backend(self):
+        backend = get_backend()
+        try:
+            set_backend("numpy")
+            self.assertEqual(get_backend(), "numpy")
+            self.assertRaises(ValueError, set_backend, "fortran")
+            with patch("orangecontrib.timeseries.aggregate._aggregate_numba",
+                       None), \
+                    patch.dict(sys.modules, {
+                        "orangecontrib.timeseries._aggregate_numba": None}):
+                self.assertRaises(ValueError, set_backend, "numba")
+            self.assertEqual(get_backend(), "numpy")
+        finally:
+            set_backend(backend)
+
+    def test_default_backend(self):
+        # numba is opt-in and not imported with aggregate
+        self.assertEqual(get_backend(), "numpy")
+
+    @unittest.skipIf(find_spec("numba") is None, "numba is not installed")
+    def test_numba_backend(self):
+        def compute():
+            return [moving_quantile(x, 7, 3, 0.25), windowed_mode(x, 7, 2),
+                    range_quantile(x2, starts, ends, 0.75),
+                    range_mode(x2, starts, ends)]
+
+        rgen = np.random.default_rng(42)
+        x = rgen.integers(0, 5, 200).astype(float)
+        x[rgen.random(200) < 0.3] = np.nan
+        x[50:60] = np.nan
+        x2 = np.column_stack((x, rgen.normal(size=200)))
+        starts, ends = time_windows(np.cumsum(rgen.exponential(1, 200)), 5)
+        backend = get_backend()
+        try:
+            set_backend("numpy")
+            exp = compute()
+            set_backend("numba")
+            for res, exp_res in zip(compute(), exp):
+                np.testing.assert_allclose(res, exp_res, rtol=1e-12)
+        finally:
+            set_backend(backend)
+
+
+class TimeBlocksTest(unittest.TestCase):
+    def test_time_blocks(self):
+        rgen = np.random.default_rng(42)
+        # include dates before 1970, leap days and fractional seconds
+        times = np.hstack((rgen.uniform(-2e9, 3e9, 500),
+                           [-0.5, 0, 951782400, 951868799.9999996]))
+        tvar = TimeVariable("t", have_date=True, have_time=True)
+        data = Timeseries.from_numpy(Domain([tvar]), times[:, None])
+        dates = [utc_from_timestamp(t) for t in data.get_column(tvar)]
+        fields = (
+            ("Years", lambda d: d.replace(month=1, day=1, hour=0, minute=0,
+                                          second=0, microsecond=0)),
+            ("Days", lambda d: d.replace(hour=0, minute=0, second=0,
+                                         microsecond=0)),
+            ("Seconds", lambda d: d.replace(microsecond=0)),
+        )
+        for name, trunc in fields:
+            _, periods, indices, counts = \
+                time_blocks(data, PeriodOptions[name], "x", False)
+            exp = [calendar.timegm(trunc(d).timetuple()) for d in dates]
+            np.testing.assert_equal(periods[indices], exp, err_msg=name)
+            np.testing.assert_equal(np.bincount(indices), counts)
+
+        fields = (
+            ("Month of year", lambda d: d.month),
+            ("Day of year", lambda d: d.timetuple().tm_yday),
+            ("Day of month", lambda d: d.day),
+            ("Day of week", lambda d: d.weekday()),
+            ("Hour of day", lambda d: d.hour),
+        )
+        for name, field in fields:
+            _, periods, indices, _ = \
+                time_blocks(data, PeriodOptions[name], "x", False)
+            np.testing.assert_equal(periods[indices],
+                                    [field(d) for d in dates], err_msg=name)
+
 
 if __name__ == "__main__":
     unittest.main()
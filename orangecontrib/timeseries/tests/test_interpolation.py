@@ -1,7 +1,11 @@
 import unittest
+from unittest.mock import patch
+
 import numpy as np
 
 from orangecontrib.timeseries import Timeseries, interpolate_timeseries
+from orangecontrib.timeseries.functions import \
+    _interpolate_1d, _interpolate_block, _interpolate_multivariate
 
 
 class TestInterpolation(unittest.TestCase):
@@ -14,7 +18,140 @@ class TestInterpolation(unittest.TestCase):
             self.data = data
 
     def test_methods(self):
-        for method in ('linear', 'cubic', 'nearest', 'mean'):
+        for method in ('linear', 'cubic', 'nearest', 'mean',
+                       'ffill', 'bfill', 'pchip', 'spline'):
             interpolated = interpolate_timeseries(self.data, method=method)
             self.assertFalse(np.isnan(interpolated.Y).any())
             self.assertTrue(np.isnan(self.data.Y).any())
+
+    def test_multivariate_chunks(self):
+        from Orange.data import ContinuousVariable
+        from scipy.interpolate import griddata
+
+        rgen = np.random.default_rng(42)
+        variables = [ContinuousVariable(f"x{i}") for i in range(4)]
+        A = np.sin(np.arange(200)[:, None] / 10 + np.arange(4))
+        isnan = rgen.random(A.shape) < 0.2
+        A[isnan] = np.nan
+
+        # a single chunk is the same as triangulating the whole table
+        nonnan = ~isnan
+        expected = A.copy()
+        expected[isnan] = griddata(
+            nonnan.nonzero(), A[nonnan], isnan.nonzero())
+        np.testing.assert_equal(
+            _interpolate_multivariate(A, variables, "linear", A.size),
+            expected)
+
+        for chunk_size in (40, 100, 1000):
+            interpolated = \
+                _interpolate_multivariate(A, variables, "linear", chunk_size)
+            np.testing.assert_equal(interpolated[nonnan], A[nonnan])
+            defined = interpolated[isnan & ~np.isnan(interpolated)]
+            self.assertGreater(len(defined), 0.9 * isnan.sum())
+            self.assertTrue(np.all(np.abs(defined) <= 1))
+
+        data = Timeseries.from_numpy(None, A)
+        interpolated = interpolate_timeseries(
+            data, multivariate=True, chunk_size=100)
+        self.assertEqual(interpolated.domain, data.domain)
+        self.assertFalse(np.isnan(interpolated.X).any())
+
+    def test_interp_columns(self):
+        data = self.data
+        for multivariate in (False, True):
+            interpolated = interpolate_timeseries(
+                data, method="cubic", multivariate=multivariate)
+            data.set_interpolation("cubic", multivariate)
+            np.testing.assert_equal(data.interp().Y, interpolated.Y)
+            np.testing.assert_equal(data.interp("Air passengers"),
+                                    interpolated.Y[:, None])
+            np.testing.assert_equal(data.interp([data.domain.class_var]),
+                                    interpolated.Y[:, None])
+
+    def test_fill(self):
+        y = self.data.Y
+        ffill = interpolate_timeseries(self.data, method='ffill').Y
+        bfill = interpolate_timeseries(self.data, method='bfill').Y
+        np.testing.assert_equal(ffill[10:15], y[9])
+        np.testing.assert_equal(bfill[10:15], y[15])
+        # edges are filled with the first or the last number
+        np.testing.assert_equal(ffill[:2], y[2])
+        np.testing.assert_equal(bfill[-2:], y[-3])
+
+    def test_pchip_spline(self):
+        from scipy.interpolate import PchipInterpolator, CubicSpline
+
+        x = self.data.time_values.astype(float)
+        y = self.data.Y
+        defined = ~np.isnan(y)
+        # pchip fitted around gaps is the same as fitted to all numbers
+        pchip = interpolate_timeseries(self.data, method='pchip').Y
+        np.testing.assert_almost_equal(
+            pchip[10:15], PchipInterpolator(x[defined], y[defined])(x[10:15]))
+        spline = interpolate_timeseries(self.data, method='spline').Y
+        np.testing.assert_allclose(
+            spline[10:15],
+            CubicSpline(x[defined], y[defined], bc_type='natural')(x[10:15]),
+            rtol=1e-3)
+        np.testing.assert_equal(spline[:2], y[2])
+
+    def test_max_gap(self):
+        for method in ('linear', 'nearest', 'mean', 'ffill', 'spline'):
+            interpolated = interpolate_timeseries(
+                self.data, method=method, max_gap=4).Y
+            self.assertTrue(np.isnan(interpolated[10:15]).all())
+            self.assertFalse(np.isnan(interpolated[:2]).any())
+            self.assertFalse(np.isnan(interpolated[-2:]).any())
+
+            interpolated = interpolate_timeseries(
+                self.data, method=method, max_gap=5).Y
+            self.assertFalse(np.isnan(interpolated).any())
+
+        data = self.data
+        data.set_interpolation("linear", max_gap=4)
+        self.assertTrue(np.isnan(data.interp("Air passengers")[10:15]).all())
+        data.set_interpolation("linear")
+        self.assertFalse(np.isnan(data.interp("Air passengers")).any())
+
+    def test_interpolate_block(self):
+        rgen = np.random.default_rng(42)
+        A = rgen.normal(size=(50, 6))
+        A[rgen.random(A.shape) < 0.3] = np.nan
+        A[:, 0] = np.nan
+        A[1:, 1] = np.nan
+        A[:, 2] = 1
+        # irregular times, with ties for nearest
+        x = np.cumsum(rgen.integers(1, 3, len(A))).astype(float)
+        for method in ("linear", "nearest", "mean", "cubic", "ffill", "bfill"):
+            np.testing.assert_equal(
+                _interpolate_block(A, x, method),
+                np.column_stack([_interpolate_1d(col, x, method)
+                                 for col in A.T]))
+        self.assertTrue(np.isnan(A[:, 0]).all())
+
+    def test_interp_cache(self):
+        data = self.data
+        with patch("orangecontrib.timeseries.functions._interpolate_block",
+                   wraps=_interpolate_block) as interpolate:
+            x = data.interp("Air passengers")
+            data.interp("Air passengers")
+            interpolate.assert_called_once()
+            # only the time variable (attribute) is not cached yet
+            data.interp()
+            self.assertEqual(interpolate.call_count, 2)
+            data.interp()
+            self.assertEqual(interpolate.call_count, 2)
+
+            data.set_interpolation("nearest")
+            data.interp("Air passengers")
+            self.assertEqual(interpolate.call_count, 3)
+            data.set_interpolation()
+            data.interp("Air passengers")
+            self.assertEqual(interpolate.call_count, 3)
+
+            with data.unlocked():
+                data.Y[3] = np.nan
+            y = data.interp("Air passengers")
+            self.assertEqual(interpolate.call_count, 4)
+            self.assertNotEqual(x[3, 0], y[3, 0])
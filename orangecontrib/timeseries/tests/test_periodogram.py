@@ -1,7 +1,8 @@
 import unittest
 import numpy as np
 
-from orangecontrib.timeseries import Timeseries, periodogram, periodogram_nonequispaced
+from orangecontrib.timeseries import Timeseries, periodogram, periodogram_nonequispaced, \
+    periodogram_welch
 
 
 data = Timeseries.from_file('airpassengers')
@@ -13,6 +14,48 @@ class TestPeriodogram(unittest.TestCase):
         self.assertEqual(max(pgram), 1)
         self.assertEqual(np.round(periods[pgram == 1]), 6)
 
+    def test_periodogram_welch(self):
+        from unittest.mock import patch
+        from scipy.signal import welch
+        from orangecontrib.timeseries import functions
+
+        periods, pgram = periodogram_welch(data.Y)
+        self.assertEqual(max(pgram), 1)
+        self.assertEqual(np.round(periods[pgram == 1]), 6)
+
+        rgen = np.random.default_rng(42)
+        X = rgen.normal(size=(2000, 3)) \
+            + 3 * np.sin(2 * np.pi * np.arange(2000)[:, None] / [10, 20, 25])
+        for nperseg, noverlap, nfft in ((256, None, None), (100, 30, None),
+                                        (100, 30, 400), (None, None, None)):
+            with patch.object(functions, "_significant_periods",
+                              wraps=functions._significant_periods) as sig:
+                pgrams = periodogram_welch(X, nperseg, noverlap, nfft)
+            freqs, expected = welch(np.diff(X, axis=0),
+                                    nperseg=nperseg or len(X) - 1,
+                                    noverlap=noverlap, nfft=nfft, axis=0)
+            for j, ((periods, pgram), _) in enumerate(sig.call_args_list):
+                np.testing.assert_almost_equal(periods, 1 / freqs[1:])
+                np.testing.assert_almost_equal(pgram, expected[1:, j])
+            # columns are the same as separate signals
+            for j, (periods, pgram) in enumerate(pgrams):
+                np.testing.assert_almost_equal(
+                    (periods, pgram),
+                    periodogram_welch(X[:, j], nperseg, noverlap, nfft))
+            for (periods, pgram), period in zip(pgrams, [10, 20, 25]):
+                self.assertAlmostEqual(periods[pgram == 1][0], period, delta=1)
+
+        self.assertRaises(ValueError, periodogram_welch, X, 100, 100)
+        self.assertRaises(ValueError, periodogram_welch, X, 100, 50, 50)
+        # segments are clipped to the length of the series, and so is overlap
+        for x in ([1., 4.], [1., 4., 9.]):
+            periodogram_welch(x, 4, 2)
+
+        # long periods are resolved by the default segment length and padding
+        x = np.sin(2 * np.pi * np.arange(2000) / 300)
+        periods, pgram = periodogram_welch(x, nfft=8000)
+        self.assertAlmostEqual(periods[pgram == 1][0], 300, delta=5)
+
     def test_periodogram_nonequispaced(self):
         periods, pgram = periodogram_nonequispaced(data.X.ravel(), data.Y, detrend='diff')
         self.assertEqual(max(pgram), 1)
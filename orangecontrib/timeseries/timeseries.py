@@ -4,7 +4,7 @@ from numbers import Number
 from more_itertools import unique_everseen
 import numpy as np
 
-from Orange.data import Table, Domain, TimeVariable
+from Orange.data import Table, Domain, TimeVariable, Variable
 
 import Orange.data
 from os.path import join, dirname
@@ -101,18 +101,29 @@ class Timeseries(Table):
         super().__init__(*args, **kwargs)
         self._interp_method = 'linear'
         self._interp_multivariate = False
+        self._interp_max_gap = None
+        # interpolated columns by (method, multivariate, max_gap) and by
+        # variables
+        self._interp_cache = {}
         self.time_delta = None
 
     def copy(self):
         other = super().copy()
         other._interp_method = self._interp_method
         other._interp_multivariate = self._interp_multivariate
+        other._interp_max_gap = self._interp_max_gap
         other.time_variable = self.time_variable
         # previous line already sets time_delta, but it could, in principle
         # be set differently, so let's copy it to be on the safe side
         other.time_delta = self.time_delta
         return other
 
+    def _update_locks(self, *args, **kwargs):
+        # Called when arrays are unlocked for writing and locked back;
+        # interpolated columns may no longer match the data
+        self._interp_cache = {}
+        return super()._update_locks(*args, **kwargs)
+
     def __getitem__(self, key):
         ts = super().__getitem__(key)
         if isinstance(ts, Timeseries) and ts.time_variable not in ts.domain:
@@ -259,25 +270,32 @@ class Timeseries(Table):
             if 'time_variable' in self.attributes:
                 self.attributes.pop('time_variable')
             self.time_delta = None
+            self._interp_cache = {}
             return
 
         assert var in self.domain
         self.attributes = self.attributes.copy()
         self.attributes['time_variable'] = var
+        self._interp_cache = {}
 
         self.time_delta = TimeDelta(self.time_values)
 
-    def set_interpolation(self, method='linear', multivariate=False):
+    def set_interpolation(self, method='linear', multivariate=False,
+                          max_gap=None):
         self._interp_method = method
         self._interp_multivariate = multivariate
+        self._interp_max_gap = max_gap
 
     def interp(self, attrs=None):
         """Return values of variables in attrs, interpolated by method set
         with set_interpolated().
 
+        Each column is interpolated only once and then cached until the
+        table's arrays are unlocked for writing.
+
         Parameters
         ----------
-        attrs : str or list or None
+        attrs : str or Variable or list or None
             Variable or List of variables to interpolate. If None, the
             whole table is returned interpolated.
 
@@ -286,14 +304,22 @@ class Timeseries(Table):
         X : array (n_inst x n_attrs) or Timeseries
             Interpolated variables attrs in columns.
         """
-        from orangecontrib.timeseries import interpolate_timeseries
-        # FIXME: This interpolates the whole table, might be an overhead
-        # if only a single attr is required
-        interpolated = interpolate_timeseries(self,
-                                              self._interp_method,
-                                              self._interp_multivariate)
+        from orangecontrib.timeseries import \
+            interpolate_timeseries, interpolate_columns
+        cache = self._interp_cache.setdefault(
+            (self._interp_method, self._interp_multivariate,
+             self._interp_max_gap), {})
         if attrs is None:
-            return interpolated
-        if isinstance(attrs, str):
+            return interpolate_timeseries(self,
+                                          self._interp_method,
+                                          self._interp_multivariate,
+                                          cache,
+                                          max_gap=self._interp_max_gap)
+        if isinstance(attrs, (str, Variable)):
             attrs = [attrs]
-        return Table.from_table(Domain([], [], attrs, interpolated.domain), interpolated).metas
+        columns = interpolate_columns(self, attrs,
+                                      self._interp_method,
+                                      self._interp_multivariate,
+                                      cache,
+                                      max_gap=self._interp_max_gap)
+        return np.column_stack(columns)
@@ -23,13 +23,19 @@ class OWInterpolate(OWWidget):
     want_main_area = False
     resizing_enabled = False
 
-    Linear, Cubic, Nearest, Mean = range(4)
+    Linear, Cubic, Nearest, Mean, Previous, Next, Pchip, Spline = range(8)
     Options = ["Linear interpolation", "Cubic interpolation",
-               "Nearest point interpolation", "Mean/Mode interpolation"]
-    OptArgs = ["linear", "cubic", "nearest", "mean"]
+               "Nearest point interpolation", "Mean/Mode interpolation",
+               "Previous value", "Next value",
+               "Monotone cubic (PCHIP) interpolation",
+               "Natural spline interpolation"]
+    OptArgs = ["linear", "cubic", "nearest", "mean",
+               "ffill", "bfill", "pchip", "spline"]
 
     interpolation = settings.Setting(Linear)
     multivariate = settings.Setting(False)
+    limit_gaps = settings.Setting(False)
+    max_gap = settings.Setting(10)
     autoapply = settings.Setting(True)
 
     settings_version = 2
@@ -50,6 +56,10 @@ class OWInterpolate(OWWidget):
         gui.checkBox(box, self, 'multivariate',
                      label='Multi-variate interpolation',
                      callback=self.commit.deferred)
+        gui.spin(box, self, 'max_gap', 1, 10000, label='Longest gap:',
+                 checked='limit_gaps', checkCallback=self.commit.deferred,
+                 callback=self.commit.deferred,
+                 tooltip='Leave longer runs of missing values missing')
         gui.auto_commit(box, self, 'autoapply', 'Apply')
 
     @Inputs.time_series
@@ -65,12 +75,15 @@ class OWInterpolate(OWWidget):
             self.Outputs.interpolated.send(None)
             return
 
-        if self.interpolation not in (self.Mean, self.Nearest) \
+        if self.interpolation not in (self.Mean, self.Nearest,
+                                      self.Previous, self.Next) \
                 and any(var.is_discrete for var in self.data.domain.variables):
             self.Warning.discrete_mode()
 
         data = self.data.copy()
-        data.set_interpolation(self.OptArgs[self.interpolation], self.multivariate)
+        data.set_interpolation(self.OptArgs[self.interpolation],
+                               self.multivariate,
+                               self.max_gap if self.limit_gaps else None)
         self.Outputs.interpolated.send(try_(lambda: data.interp()) or None)
 
     @classmethod
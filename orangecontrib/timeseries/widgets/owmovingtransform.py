@@ -1,16 +1,21 @@
 from collections import Counter
+from dataclasses import dataclass
+from functools import partial
 from itertools import chain
+from typing import Optional, Dict
 
 import numpy as np
 
-from AnyQt.QtCore import Qt, QSortFilterProxyModel, QRect
+from AnyQt.QtCore import \
+    Qt, QSortFilterProxyModel, QRect, QRegularExpression
 from AnyQt.QtWidgets import \
-    QListView, QCheckBox, QLineEdit, QSizePolicy, QBoxLayout, QPushButton
-from AnyQt.QtGui import QFont
+    QListView, QCheckBox, QLineEdit, QSizePolicy, QBoxLayout, QPushButton, \
+    QScrollArea, QStyle
+from AnyQt.QtGui import QFont, QRegularExpressionValidator
 
 from orangewidget.utils.widgetpreview import WidgetPreview
 
-from Orange.data import Domain, Table, ContinuousVariable
+from Orange.data import Domain, Table, ContinuousVariable, TimeVariable
 import Orange.data.util
 from Orange.widgets import widget, gui, settings
 from Orange.widgets.utils.itemmodels import VariableListModel
@@ -18,11 +23,17 @@ from Orange.widgets.widget import Input, Output
 
 from orangecontrib.timeseries import Timeseries
 from orangecontrib.timeseries.aggregate import \
-    PeriodOptions, AggOptions, time_blocks
+    PeriodOptions, AggOptions, time_blocks, moving_statistics, \
+    MOVING_STATISTICS, group_offsets, aggregate_groups, time_windows, \
+    aggregate_ranges, MovingAggregator, run_jobs, worker_count, \
+    multi_width_statistics
 
 N_NONPERIODIC = \
     next(iter(i for i, p in enumerate(PeriodOptions.values()) if p.periodic))
 
+TimeUnits = {"seconds": 1, "minutes": 60, "hours": 3600, "days": 86400,
+             "weeks": 7 * 86400}
+
 
 class TransformationsModel(VariableListModel):
     def __init__(self, *args, **kwargs):
@@ -87,6 +98,14 @@ class NumericFilterProxy(QSortFilterProxyModel):
             and (not self.pattern or self.pattern in var.name)
 
 
+@dataclass
+class SlidingState:
+    key: tuple
+    data: Timeseries
+    x: Optional[np.ndarray]
+    aggregators: Optional[Dict[tuple, MovingAggregator]]
+
+
 class OWMovingTransform(widget.OWWidget):
     name = 'Moving Transform'
     description = 'Apply rolling window functions to the time series.'
@@ -97,6 +116,7 @@ class OWMovingTransform(widget.OWWidget):
 
     mainArea_width_height_ratio = None
 
+
     class Inputs:
         time_series = Input("Time series", Table)
 
@@ -131,11 +151,12 @@ class OWMovingTransform(widget.OWWidget):
                      "including the leading ones, for which the aggregate\n"
                      "is not computed.")
 
-    SlidingWindow, SequentialBlocks, TimePeriods = range(3)
+    SlidingWindow, SequentialBlocks, TimePeriods, TimeWindow = range(4)
 
     method = settings.Setting(SlidingWindow)
 
     window_width = settings.Setting(5)
+    extra_widths = settings.Setting("")
     keep_instances = settings.Setting(KeepComplete)
 
     block_width = settings.Setting(5)
@@ -144,7 +165,12 @@ class OWMovingTransform(widget.OWWidget):
     period_width = settings.Setting("Years")
     use_names = settings.Setting(True)
 
+    time_window_width = settings.Setting(1)
+    time_window_unit = settings.Setting("days")
+
     var_hints = settings.Setting({}, schema_only=True)
+    # Number of threads that compute aggregations; 0 uses all cores
+    n_jobs = settings.Setting(0)
     autocommit = settings.Setting(True)
 
     migrated_aggregate = settings.Setting(False)
@@ -152,6 +178,9 @@ class OWMovingTransform(widget.OWWidget):
     def __init__(self):
         self.data = None
         self.only_numeric = False
+        # Data, output and aggregators from the last sliding window
+        # computation; used to compute only new rows if data is appended
+        self._sliding_state: Optional[SlidingState] = None
 
         self.mainArea.layout().setDirection(QBoxLayout.LeftToRight)
         box = gui.hBox(self.controlArea, True)
@@ -167,6 +196,13 @@ class OWMovingTransform(widget.OWWidget):
             2, 1000, label='Window width:',
             controlWidth=80, alignment=Qt.AlignRight,
             callback=self._window_width_changed)
+        gui.lineEdit(
+            indbox, self, "extra_widths", label="Additional widths:",
+            orientation=Qt.Horizontal, controlWidth=80,
+            placeholderText="e.g. 15, 60",
+            validator=QRegularExpressionValidator(
+                QRegularExpression("[0-9, ]*")),
+            callback=self._window_width_changed)
         cb = gui.comboBox(
             indbox, self, "keep_instances", items=self.KEEP_OPTIONS,
             sizePolicy=(QSizePolicy.MinimumExpanding, QSizePolicy.Fixed),
@@ -202,9 +238,28 @@ class OWMovingTransform(widget.OWWidget):
         cb.insertSeparator(N_NONPERIODIC)
         gui.checkBox(indbox, self, "use_names", "",
                      callback=self.commit.deferred).setVisible(False)
+        gui.separator(buttons)
+
+        self.rb_time_window = gui.appendRadioButton(
+            buttons, "Sliding time window", buttons)
+        indbox = gui.hBox(gui.indentedBox(buttons))
+        gui.spin(
+            indbox, self, 'time_window_width',
+            1, 1000, label='Last',
+            controlWidth=80, alignment=Qt.AlignRight,
+            callback=self._time_window_changed)
+        gui.comboBox(
+            indbox, self, "time_window_unit",
+            items=list(TimeUnits), sendSelectedValue=True,
+            callback=self._time_window_changed)
 
         gui.rubber(buttons)
 
+        gui.spin(
+            gui.hBox(self.controlArea), self, "n_jobs", 0, worker_count(),
+            label="Threads:", controlWidth=80, alignment=Qt.AlignRight,
+            callback=self.commit.deferred).setSpecialValueText("Auto")
+
         vbox = gui.vBox(self.mainArea, True)
         self.filter_line = QLineEdit(placeholderText="Filter ...")
         self.filter_line.textEdited.connect(self._filter_changed)
@@ -229,12 +284,23 @@ class OWMovingTransform(widget.OWWidget):
         gui.checkBox(vbox, self, "only_numeric", "Show only numeric variables",
                      callback=self._show_numeric_changed)
 
-        cbox = gui.vBox(self.mainArea)
+        # There are too many aggregations to fit the minimal widget height
+        cbox = gui.vBox(None)
         for agg in AggOptions.values():
             cb = QCheckBox(agg.long_desc)
             cb.setObjectName(agg.short_desc)
             cb.clicked.connect(self._checkbox_changed)
             cbox.layout().addWidget(cb)
+        gui.rubber(cbox)
+        scroll = QScrollArea(
+            horizontalScrollBarPolicy=Qt.ScrollBarAlwaysOff,
+            widgetResizable=True)
+        scroll.setWidget(cbox)
+        scroll.setMinimumWidth(
+            cbox.sizeHint().width()
+            + scroll.style().pixelMetric(QStyle.PM_ScrollBarExtent)
+            + 2 * scroll.frameWidth())
+        self.mainArea.layout().addWidget(scroll)
 
         gui.auto_commit(self.buttonsArea, self, 'autocommit', '&Apply')
 
@@ -279,6 +345,11 @@ class OWMovingTransform(widget.OWWidget):
         self._set_naming_visibility()
         self.commit.deferred()
 
+    def _time_window_changed(self):
+        self.method = self.TimeWindow
+        self._hide_migrated_aggregate()
+        self.commit.deferred()
+
     def _set_naming_visibility(self):
         period = PeriodOptions[self.period_width]
         visible = self.method == self.TimePeriods and period.names is not None
@@ -355,6 +426,9 @@ class OWMovingTransform(widget.OWWidget):
         disabled = self.data is not None and self.data.time_variable is None
         self.rb_period.setDisabled(disabled)
         self.controls.period_width.setDisabled(disabled)
+        self.controls.time_window_unit.setDisabled(
+            self.data is not None
+            and not isinstance(self.data.time_variable, TimeVariable))
 
         self._selection_changed()
         self._set_naming_visibility()
@@ -373,15 +447,28 @@ class OWMovingTransform(widget.OWWidget):
         else:
             ts = [self._compute_sliding_window,
                   self._compute_sequential_blocks,
-                  self._compute_period_aggregation][self.method]()
+                  self._compute_period_aggregation,
+                  self._compute_time_window][self.method]()
         self.Outputs.time_series.send(ts)
 
+    def _window_widths(self):
+        widths = {int(width) for width in self.extra_widths.split(",")
+                  if width.strip() and int(width)}
+        return sorted(widths | {self.window_width})
+
     def _compute_sliding_window(self):
+        widths = self._window_widths()
+        if len(widths) > 1:
+            self._sliding_state = None
+            return self._compute_multi_width(widths)
+
         data = self.data
         domain = data.domain
         model = self.var_model
+        width = self.window_width
         discard = self.keep_instances == self.DiscardOriginal
-        self.Warning.window_to_large(shown=self.window_width > len(data))
+        keep_all = self.keep_instances == self.KeepAll
+        self.Warning.window_to_large(shown=width > len(data))
 
         names = [f"{var.name} ({trans})"
                  for i, var in enumerate(model)
@@ -391,103 +478,177 @@ class OWMovingTransform(widget.OWWidget):
         else:
             names = iter(Orange.data.util.get_unique_names(domain, names))
 
-        attributes = []
-        columns = []
-        if discard:
-            rows = leading = None
-        elif self.keep_instances == self.KeepComplete:
-            rows = slice(self.window_width - 1, None)
-            leading = None
+        attributes, originals, groups = \
+            self._plan_aggregations(not discard, names)
+        self._set_warnings(attributes, None)
+        if not attributes:
+            self._sliding_state = None
+            return None
+
+        rows = ... if keep_all else slice(width - 1, None)
+        key = (domain, width, self.keep_instances, tuple(originals),
+               tuple((transformation, k, tuple(positions), tuple(indices))
+                     for (transformation, k), (_, positions, indices)
+                     in groups.items()))
+        state = self._sliding_state
+        if state is not None and state.key == key \
+                and self._is_appended(state.data, data):
+            x = self._append_sliding_window(state, originals, groups)
         else:
-            rows = ...
-            leading = np.full(self.window_width - 1, np.nan)
-
-        def add_aggregates(attr, column):
-            if attr not in model:  # skip time_attribute
-                return
-            row = model.indexOf(attr)
-            for transformation in model.get_transformations(row):
-                agg = AggOptions[transformation]
-                attributes.append(self._var_for_agg(attr, agg, names))
-                if agg.cumulative and self.keep_instances == self.KeepAll:
-                    agg_column = agg.cumulative(column)
+            state = SlidingState(key, data, None, None)
+            nrows = len(data) if keep_all else max(len(data) - width + 1, 0)
+            x = np.empty((nrows, len(attributes)))
+            self._fill_originals(x, originals, rows)
+            for transformation, positions, agg_columns in \
+                    self._aggregate_groups(groups, width, 1, keep_all):
+                if keep_all and not AggOptions[transformation].cumulative:
+                    x[:width - 1, positions] = np.nan
+                    x[width - 1:, positions] = agg_columns
                 else:
-                    agg_column = agg.transform(column, self.window_width, 1)
-                    if self.keep_instances == self.KeepAll:
-                        agg_column = np.hstack((leading, agg_column))
-                columns.append(agg_column)
-
-        for attr, column in zip(domain.attributes, data.X.T):
-            if not discard:
-                attributes.append(attr)
-                columns.append(column[rows])
-            add_aggregates(attr, column)
-        for attr, column in zip(domain.class_vars,
-                                [data.Y] if data.Y.ndim == 1 else data.Y.T):
-            add_aggregates(attr, column)
-
-        self._set_warnings(columns, None)
-        if not columns:
+                    x[:, positions] = agg_columns
+        state.data, state.x = data, x
+        self._sliding_state = state
+        return self._output_table(attributes, x, None if discard else rows)
+
+    def _compute_multi_width(self, widths):
+        # Aggregates for windows of all widths; columns of each width follow
+        # the original data. Rows are aligned at the ends of windows, so the
+        # widest window determines the first row (unless all are kept).
+        # MOVING_STATISTICS are computed for all widths in a single pass.
+        data = self.data
+        domain = data.domain
+        model = self.var_model
+        discard = self.keep_instances == self.DiscardOriginal
+        keep_all = self.keep_instances == self.KeepAll
+        self.Warning.window_to_large(shown=widths[-1] > len(data))
+
+        names = [f"{var.name} ({trans}, {width})"
+                 for width in widths
+                 for i, var in enumerate(model)
+                 for trans in model.get_transformations(i)]
+        names = iter(Orange.data.util.get_unique_names(
+            [] if discard else domain, names))
+
+        attributes = [] if discard else list(domain.attributes)
+        originals = list(enumerate(range(len(attributes))))
+        plans = []
+        for width in widths:
+            _, _, groups = \
+                self._plan_aggregations(False, names, attributes=attributes)
+            plans.append(groups)
+        self._set_warnings(attributes, None)
+        if not attributes:
             return None
 
-        x = np.vstack(columns).T
-        if discard:
-            domain = Domain(attributes)
-            return Timeseries.from_numpy(
-                domain, x, attributes=data.attributes)
-        else:
-            domain = Domain(attributes, domain.class_vars, domain.metas)
+        rows = ... if keep_all else slice(widths[-1] - 1, None)
+        nrows = len(data) if keep_all else max(len(data) - widths[-1] + 1, 0)
+        x = np.empty((nrows, len(attributes)))
+        self._fill_originals(x, originals, rows)
+        for _, positions, agg_columns in \
+                self._aggregate_widths(plans, widths, keep_all):
+            agg_columns = agg_columns[max(len(agg_columns) - nrows, 0):]
+            x[:nrows - len(agg_columns), positions] = np.nan
+            x[nrows - len(agg_columns):, positions] = agg_columns
+        return self._output_table(attributes, x, None if discard else rows)
+
+    def _output_table(self, attributes, x, rows):
+        # Output with the given attributes and values; unless rows is None,
+        # class variables, metas, weights and ids are taken from these rows
+        data = self.data
+        if rows is None:
             return Timeseries.from_numpy(
-                domain, x, data.Y[rows], data.metas[rows], data.W[rows],
-                data.attributes, ids=data.ids[rows]
-            )
+                Domain(attributes), x, attributes=data.attributes)
+        domain = Domain(attributes, data.domain.class_vars, data.domain.metas)
+        return Timeseries.from_numpy(
+            domain, x, data.Y[rows], data.metas[rows], data.W[rows],
+            data.attributes, ids=data.ids[rows])
+
+    def _aggregate_widths(self, plans, widths, cumulative):
+        # Like _aggregate_groups, for plans of aggregations for each width;
+        # MOVING_STATISTICS of each column are computed for all widths at once
+        def compute_statistics(statistics, source, positions, indices):
+            results = multi_width_statistics(
+                source[:, indices], widths, statistics)
+            return [(name, [pos[name][j] for pos in positions], values)
+                    for j, width_results in enumerate(results)
+                    for name, values in width_results.items()]
+
+        others, batches = self._batch_statistics(plans)
+        results = []
+        for width, other in zip(widths, others):
+            results += self._aggregate_groups(other, width, 1, cumulative)
+        jobs = []
+        for statistics, source, positions, indices in batches:
+            jobs += self._split_jobs(
+                partial(compute_statistics, statistics, source),
+                positions, indices)
+        return results + list(chain.from_iterable(run_jobs(jobs, self.n_jobs)))
+
+    def _append_sliding_window(self, state, originals, groups):
+        # Computes only the rows for data appended since the state was stored
+        width = self.window_width
+        keep_all = self.keep_instances == self.KeepAll
+        old_n, n = len(state.data), len(self.data)
+        if state.aggregators is None:
+            state.aggregators = {}
+            for key, (source, _, indices) in groups.items():
+                agg = AggOptions[key[0]]
+                if keep_all and agg.cumulative:
+                    aggregator = agg.make_aggregator(1)
+                else:
+                    aggregator = agg.make_aggregator(width)
+                aggregator.init(source[:old_n, indices])
+                state.aggregators[key] = aggregator
+
+        first = old_n if keep_all else max(old_n, width - 1)
+        x = np.empty((max(n - first, 0), state.x.shape[1]))
+        self._fill_originals(x, originals, slice(first, None))
+        for key, (source, positions, indices) in groups.items():
+            aggregator = state.aggregators[key]
+            agg_columns = aggregator.update(source[old_n:, indices])
+            x[:len(x) - len(agg_columns), positions] = np.nan
+            x[len(x) - len(agg_columns):, positions] = agg_columns
+        return np.vstack((state.x, x))
+
+    @staticmethod
+    def _is_appended(old, new):
+        n = len(old)
+        return new.domain == old.domain and len(new) >= n \
+            and all(np.array_equal(new_values[:n], old_values,
+                                   equal_nan=old_values.dtype != object)
+                    for new_values, old_values in ((new.X, old.X),
+                                                   (new.Y, old.Y),
+                                                   (new.metas, old.metas)))
 
     def _compute_sequential_blocks(self):
         data = self.data
         domain = data.domain
-        model = self.var_model
         width = self.block_width
         if width > len(data):
             self.Warning.block_to_large()
             return None
 
-        def add_aggregates(attr, column=None):
-            if attr not in model:  # skip time_attribute
-                return
-            row = model.indexOf(attr)
-            for transformation in model.get_transformations(row):
-                agg = AggOptions[transformation]
-                if agg.block_transform is None:
-                    inapplicable.add(agg.long_desc)
-                    continue
-                if column is None:
-                    column = data.get_column(attr)
-                agg_column = agg.transform(column, width, width)
-                attributes.append(self._var_for_agg(attr, agg, names))
-                columns.append(agg_column)
-
         names = self._names_for_blocked_aggregation()
-        attributes = []
-        columns = []
         inapplicable = set()
+        discard = self.ref_instance == self.DiscardOriginal
+        attributes, originals, groups = \
+            self._plan_aggregations(not discard, names, inapplicable)
+        self._set_warnings(attributes, inapplicable)
+        if not attributes:
+            return None
+
         rows = {self.DiscardOriginal: slice(0, 0),
                 self.KeepFirst: slice(0, -(width - 1), width),
                 self.KeepMiddle: slice(width // 2, -(width - 1 - width // 2), width),
                 self.KeepLast: slice(width - 1, None, width)
                 }[self.ref_instance]
-        for attr, column in zip(domain.attributes, data.X.T):
-            if self.ref_instance != self.DiscardOriginal:
-                attributes.append(attr)
-                columns.append(column[rows])
-            add_aggregates(attr, column)
-        for attr in domain.class_vars:
-            add_aggregates(attr)
-        self._set_warnings(columns, inapplicable)
-        if not columns:
-            return None
+        x = np.empty((len(data) // width, len(attributes)))
+        self._fill_originals(x, originals, rows)
+        for _, positions, agg_columns in \
+                self._aggregate_groups(groups, width, width):
+            x[:, positions] = agg_columns
 
-        x = np.vstack(columns).T
-        if self.ref_instance == self.DiscardOriginal:
+        if discard:
             return Timeseries.from_numpy(Domain(attributes), x)
         else:
             new_domain = Domain(attributes, domain.class_vars, domain.metas)
@@ -496,6 +657,127 @@ class OWMovingTransform(widget.OWWidget):
                 data.attributes, ids=data.ids[rows]
             )
 
+    def _plan_aggregations(self, keep_original, names, inapplicable=None,
+                           attributes=None):
+        # Lays out output columns: each attribute (if kept) is followed by its
+        # aggregates, and class variables' aggregates come last. Columns with
+        # the same aggregation of the same source array are grouped, so that
+        # each aggregation is computed with a single call on a 2d array.
+        # If `inapplicable` is given, aggregations without block_transform
+        # are skipped and recorded there. If `attributes` are given, columns
+        # are appended to them.
+        data = self.data
+        domain = data.domain
+        model = self.var_model
+        y = data.Y if data.Y.ndim == 2 else data.Y[:, None]
+
+        if attributes is None:
+            attributes = []
+        originals = []
+        groups = {}
+        for k, (variables, source) in enumerate(((domain.attributes, data.X),
+                                                 (domain.class_vars, y))):
+            for i, attr in enumerate(variables):
+                if keep_original and k == 0:
+                    originals.append((len(attributes), i))
+                    attributes.append(attr)
+                if attr not in model:  # skip time_attribute
+                    continue
+                for transformation in \
+                        model.get_transformations(model.indexOf(attr)):
+                    agg = AggOptions[transformation]
+                    if inapplicable is not None \
+                            and agg.block_transform is None:
+                        inapplicable.add(agg.long_desc)
+                        continue
+                    _, positions, indices = groups.setdefault(
+                        (transformation, k), (source, [], []))
+                    positions.append(len(attributes))
+                    indices.append(i)
+                    attributes.append(self._var_for_agg(attr, agg, names))
+        return attributes, originals, groups
+
+    def _aggregate_groups(self, groups, width, shift, cumulative=False):
+        # Returns a list of transformations, positions of output columns and
+        # their values. Columns with more than one of MOVING_STATISTICS
+        # selected are batched by the set of selected statistics and computed
+        # in a single pass. If `cumulative` is set, cumulative aggregations
+        # are computed over the entire data instead of windows.
+        # Columns of each batch are split into jobs that run in parallel.
+        def transform(transformation, source, positions, indices):
+            agg = AggOptions[transformation]
+            columns = source[:, indices]
+            if cumulative and agg.cumulative:
+                return [(transformation, positions, agg.cumulative(columns))]
+            return [(transformation, positions,
+                     agg.transform(columns, width, shift))]
+
+        def compute_statistics(statistics, source, positions, indices):
+            columns = source[:, indices]
+            if len(statistics) == 1:
+                results = {statistics[0]: AggOptions[statistics[0]].transform(
+                    columns, width, shift)}
+            else:
+                results = moving_statistics(columns, width, shift, statistics)
+            return [(name, [pos[name][0] for pos in positions], values)
+                    for name, values in results.items()]
+
+        (other, ), batches = self._batch_statistics([groups])
+        jobs = []
+        for (transformation, _), (source, positions, indices) \
+                in other.items():
+            jobs += self._split_jobs(
+                partial(transform, transformation, source), positions, indices)
+        for statistics, source, positions, indices in batches:
+            jobs += self._split_jobs(
+                partial(compute_statistics, statistics, source),
+                positions, indices)
+        return list(chain.from_iterable(run_jobs(jobs, self.n_jobs)))
+
+    @staticmethod
+    def _batch_statistics(plans):
+        # Separates MOVING_STATISTICS from plans (groups from
+        # _plan_aggregations, e.g. for different widths) and batches columns
+        # by the set of selected statistics. Returns the remaining groups of
+        # each plan, and a list of batches (statistics, source, positions,
+        # indices), where positions map statistics to lists of output
+        # columns in each plan.
+        others = []
+        fusable = {}
+        for groups in plans:
+            other = {}
+            for (transformation, k), group in groups.items():
+                if transformation not in MOVING_STATISTICS:
+                    other[transformation, k] = group
+                    continue
+                source, positions, indices = group
+                for position, i in zip(positions, indices):
+                    fusable.setdefault((k, i), (source, {})) \
+                        [1].setdefault(transformation, []).append(position)
+            others.append(other)
+
+        batches = {}
+        for (k, i), (source, stat_positions) in fusable.items():
+            _, indices, positions = batches.setdefault(
+                (k, tuple(sorted(stat_positions))), (source, [], []))
+            indices.append(i)
+            positions.append(stat_positions)
+        return others, [(statistics, source, positions, indices)
+                        for (_, statistics), (source, indices, positions)
+                        in batches.items()]
+
+    def _split_jobs(self, func, positions, indices):
+        # Splits columns into (at most) one job per worker
+        nparts = min(worker_count(self.n_jobs), len(indices))
+        return [partial(func, [positions[j] for j in part],
+                        [indices[j] for j in part])
+                for part in np.array_split(np.arange(len(indices)), nparts)]
+
+    def _fill_originals(self, x, originals, rows):
+        if originals:
+            positions, indices = map(list, zip(*originals))
+            x[:, positions] = self.data.X[rows][:, indices]
+
     def _compute_period_aggregation(self):
         data = self.data
         model = self.var_model
@@ -513,7 +795,9 @@ class OWMovingTransform(widget.OWWidget):
         attributes.append(ContinuousVariable(next(names)))
         columns.append(counts)
 
+        order, offsets = group_offsets(period_indices, len(periods))
         inapplicable = set()
+        jobs = []
         for i, attr in enumerate(model):
             for transformation in model.get_transformations(i):
                 agg = AggOptions[transformation]
@@ -521,17 +805,50 @@ class OWMovingTransform(widget.OWWidget):
                     inapplicable.add(agg.long_desc)
                     continue
                 attributes.append(self._var_for_agg(attr, agg, names))
-                column = data.get_column(attr)
-                agg_column = np.array([
-                    agg.block_transform(column[period_indices == i])
-                    for i in range(len(periods))])
-                columns.append(agg_column)
+                jobs.append(partial(aggregate_groups, data.get_column(attr),
+                                    order, offsets, agg))
+        columns += run_jobs(jobs, self.n_jobs)
 
         self._set_warnings(columns, inapplicable)
         if not columns:
             return None
         return Timeseries.from_numpy(Domain(attributes), np.vstack(columns).T)
 
+    def _compute_time_window(self):
+        data = self.data
+        # For data without time variable or with a continuous variable as
+        # time, the duration is in the units of time_values
+        duration = self.time_window_width
+        if isinstance(data.time_variable, TimeVariable):
+            duration *= TimeUnits[self.time_window_unit]
+
+        names = self._names_for_blocked_aggregation()
+        inapplicable = set()
+        attributes, originals, groups = \
+            self._plan_aggregations(True, names, inapplicable)
+        self._set_warnings(groups, inapplicable)
+        if not groups:
+            return None
+
+        starts, ends = time_windows(data.time_values, duration)
+        x = np.empty((len(data), len(attributes)))
+        self._fill_originals(x, originals, ...)
+
+        def aggregate(agg, source, positions, indices):
+            return positions, aggregate_ranges(
+                source[:, indices], starts, ends, agg)
+
+        jobs = []
+        for (transformation, _), (source, positions, indices) \
+                in groups.items():
+            jobs += self._split_jobs(
+                partial(aggregate, AggOptions[transformation], source),
+                positions, indices)
+        for positions, agg_columns in run_jobs(jobs, self.n_jobs):
+            x[:, positions] = agg_columns
+
+        return self._output_table(attributes, x, ...)
+
     def _names_for_blocked_aggregation(self):
         # Sequential blocks do not use `block_transform` function, but the
         # presence of this function indicates that the aggregations is
@@ -546,7 +863,8 @@ class OWMovingTransform(widget.OWWidget):
                   for i, var in enumerate(model)
                   for trans in model.get_transformations(i)
                   if AggOptions[trans].block_transform]
-        if self.method == self.SequentialBlocks \
+        if self.method == self.TimeWindow \
+                or self.method == self.SequentialBlocks \
                 and self.ref_instance != self.DiscardOriginal:
             names = Orange.data.util.get_unique_names(domain, names)
         else:
@@ -573,19 +891,26 @@ class OWMovingTransform(widget.OWWidget):
         if self.method == self.SlidingWindow:
             self.report_items(
                 "Sliding Window",
-                (("Window width", self.window_width),
+                (("Window width",
+                  ", ".join(map(str, self._window_widths()))),
                  ("Original data", self.KEEP_OPTIONS[self.keep_instances].lower())))
         elif self.method == self.SequentialBlocks:
             self.report_items(
                 "Consecutive blocks",
                 (("Block width", self.block_width),
                  ("Original data", self.REF_OPTIONS[self.ref_instance].lower())))
-        else:
-            assert self.method == self.TimePeriods
+        elif self.method == self.TimePeriods:
             self.report_items(
                 "Aggregate time periods",
                 (("Period", self.period_width), )
             )
+        else:
+            assert self.method == self.TimeWindow
+            width = self.time_window_width
+            if self.data is not None \
+                    and isinstance(self.data.time_variable, TimeVariable):
+                width = f"{width} {self.time_window_unit}"
+            self.report_items("Sliding time window", (("Last", width), ))
 
         model = self.var_model
         transformations = []
@@ -1,10 +1,15 @@
 import numpy as np
 import pyqtgraph as pg
 
+from AnyQt.QtCore import Qt
+
+from orangewidget.settings import Setting
 from orangewidget.utils.widgetpreview import WidgetPreview
 
+from Orange.widgets import gui
+
 from orangecontrib.timeseries import \
-    Timeseries, periodogram as periodogram_equispaced, periodogram_nonequispaced
+    Timeseries, periodogram_welch, periodogram_nonequispaced
 from orangecontrib.timeseries.widgets.owperiodbase import OWPeriodBase
 
 
@@ -15,16 +20,56 @@ class OWPeriodogram(OWPeriodBase):
     icon = 'icons/Periodogram.svg'
     priority = 100
 
+    segments = Setting(1)
+    overlap = Setting(50)
+
     yrange = (0, 1)
 
+    # Spectra are computed at this many times more periods than the segment
+    # length, so that long periods are not rounded to nperseg / k
+    PADDING = 4
+
+    def __init__(self):
+        super().__init__()
+        gui.separator(self.controlArea)
+        box = gui.vBox(self.controlArea, "Welch's Method")
+        gui.spin(box, self, "segments", 1, 100, label="Segments:",
+                 controlWidth=80, alignment=Qt.AlignRight,
+                 callback=self._options_changed)
+        gui.spin(box, self, "overlap", 0, 90, step=10, label="Overlap:",
+                 controlWidth=80, alignment=Qt.AlignRight,
+                 callback=self._options_changed).setSuffix(" %")
+
+    def _options_changed(self):
+        self._cached.clear()
+        self.replot()
+
+    def segment_length(self, n):
+        """Return lengths of segments and of their overlap for n values"""
+        # Segments, which overlap by a given fraction, cover the series
+        step = 1 - self.overlap / 100
+        nperseg = min(max(int(n / (1 + (self.segments - 1) * step)), 2), n)
+        return nperseg, nperseg * self.overlap // 100
+
+    def periodograms(self, attrs):
+        # Periodograms of equispaced series are computed in one batch
+        missing = [attr for attr in attrs if attr not in self._cached]
+        if missing and getattr(self.data.time_delta, "is_equispaced", True):
+            # differencing (detrend='diff') shortens the series by one
+            nperseg, noverlap = self.segment_length(len(self.data) - 1)
+            pgrams = periodogram_welch(
+                self.data.interp(missing), nperseg, noverlap,
+                self.PADDING * nperseg)
+            for attr, (periods, values) in zip(missing, pgrams):
+                if self.data.time_delta is not None:
+                    periods = periods * self.data.time_delta.time_interval
+                self._cached[attr] = (periods, values)
+        return [self.periodogram(attr) for attr in attrs]
+
     def periodogram(self, attr):
         if attr not in self._cached:
             if getattr(self.data.time_delta, "is_equispaced", True):
-                x = np.ravel(self.data.interp(attr))
-                periods, values = periodogram_equispaced(x)
-                if self.data.time_delta is not None:
-                    periods *= self.data.time_delta.time_interval
-                self._cached[attr] = (periods, values)
+                self.periodograms([attr])
             else:
                 times = np.asanyarray(self.data.time_values, dtype=float)
                 x = np.ravel(self.data[:, attr])
@@ -42,7 +87,7 @@ class OWPeriodogram(OWPeriodBase):
             return
 
         palette = self.get_palette()
-        pers_grams = [self.periodogram(attr) for attr in self.selection]
+        pers_grams = self.periodograms(self.selection)
         max_time = max(
             (np.max(periods) for periods, _ in pers_grams if periods.size),
             default=1)
@@ -38,7 +38,7 @@ from Orange.widgets.utils.itemmodels import DomainModel, VariableListModel
 
 from orangecontrib.timeseries import Timeseries
 from orangecontrib.timeseries.aggregate import \
-    PeriodOptions, AggOptions, time_blocks
+    PeriodOptions, AggOptions, time_blocks, group_offsets, aggregate_groups
 
 Clear = QItemSelectionModel.Clear
 ClearAndSelect = QItemSelectionModel.ClearAndSelect
@@ -196,15 +196,39 @@ class BlockData:
 
     # Attributes defining the blocks; either angular or angular and radial
     # Names are ensured unique
-    attributes: Optional[List[Variable]] = None
+    attributes: List[Variable]
 
     # Data for these attributes (used for output table)
-    columns: Optional[List[np.ndarray]] = None
+    columns: List[np.ndarray]
 
-    # Indices of rows for each block; dict keys are x and r
-    # The order is the same as in columns, though dict is used for faster
-    # access when outputting selection
-    indices: Optional[Dict[Tuple[int, int], np.ndarray]] = None
+    # Indices of rows, sorted by blocks in the same order as in columns;
+    # rows of i-th block are permutation[offsets[i]:offsets[i + 1]]
+    permutation: np.ndarray
+    offsets: np.ndarray
+
+    def __post_init__(self):
+        # Block index for x and r, used for outputting selection
+        if len(self.columns) == 2:
+            coords = zip(*self.columns)
+        else:
+            coords = ((x, 0) for x in self.columns[0])
+        self._blocks = {coord: i for i, coord in enumerate(coords)}
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def indices(self) -> Dict[Tuple[int, int], np.ndarray]:
+        # Indices of rows for each block, as views into permutation
+        return dict(zip(self._blocks,
+                        np.split(self.permutation, self.offsets[1:-1])))
+
+    def rows(self, coords) -> np.ndarray:
+        offsets = self.offsets
+        return np.concatenate([
+            self.permutation[offsets[i]:offsets[i + 1]]
+            for i in sorted(self._blocks[coord] for coord in coords)])
 
 
 # Data for combos
@@ -765,10 +789,8 @@ class OWSpiralogram(OWWidget):
 
         if self.r_var is None:
             return BlockData(
-                [x_attr],
-                [periods],
-                {(period, 0): np.flatnonzero(x_data == x)
-                 for x, period in enumerate(periods)})
+                [x_attr], [periods],
+                *self._block_permutation(x_data, len(periods)))
 
         if self.r_var.is_continuous:
             r_attr = self.r_binner.binned_var(self.r_var)
@@ -783,13 +805,21 @@ class OWSpiralogram(OWWidget):
             r_attr = r_attr.copy(name=group_name)
 
         ngroups = len(r_attr.values)
-        x_x_mask = ((period, x_data == x) for x, period in enumerate(periods))
         attributes = [x_attr, r_attr]
         columns = [np.repeat(periods, ngroups),
                    np.tile(np.arange(ngroups), len(periods))]
-        indices = {(x, r): np.flatnonzero(x_mask & (r_data == r))
-                   for x, x_mask in x_x_mask for r in range(ngroups)}
-        return BlockData(attributes, columns, indices)
+        return BlockData(
+            attributes, columns,
+            *self._block_permutation(x_data * ngroups + r_data,
+                                     len(periods) * ngroups))
+
+    @staticmethod
+    def _block_permutation(codes, nblocks):
+        # Rows sorted by block codes with a single stable sort, and offsets
+        # of blocks; rows with missing codes are excluded
+        rows = np.flatnonzero(np.isfinite(codes))
+        order, offsets = group_offsets(codes[rows].astype(int), nblocks)
+        return rows[order], offsets
 
     def compute_data(self):
         assert self.block_data
@@ -797,8 +827,8 @@ class OWSpiralogram(OWWidget):
         agg_desc = AggItems[self.aggregation]
 
         count_var = ContinuousVariable(self._get_unique_name("Count"))
-        counts = np.array([len(indices)
-                           for indices in self.block_data.indices.values()])
+        block_data = self.block_data
+        counts = block_data.counts
 
         if self.color_var:
             name = f"{self.color_var.name} ({agg_desc.short_desc})"
@@ -808,17 +838,15 @@ class OWSpiralogram(OWWidget):
             else:
                 class_var = ContinuousVariable(name)
             color_data = self.data.get_column(self.color_var)
-            values = np.array([
-                agg_desc.block_transform(color_data[indices])
-                if indices.size else np.nan
-                for indices in self.block_data.indices.values()])
+            values = aggregate_groups(color_data, block_data.permutation,
+                                      block_data.offsets, agg_desc)
         else:
             class_var = values = None
 
-        columns = np.vstack(self.block_data.columns + [counts]).T
+        columns = np.vstack(block_data.columns + [counts]).T
         nonzeros = counts != 0
         return Table.from_numpy(
-            Domain(self.block_data.attributes + [count_var], class_var),
+            Domain(block_data.attributes + [count_var], class_var),
             columns[nonzeros], None if values is None else values[nonzeros])
 
     # Redraw
@@ -1060,9 +1088,7 @@ class OWSpiralogram(OWWidget):
         if not self.selection:
             data = None
         else:
-            seg_indices = self.block_data.indices
-            rows = np.hstack([seg_indices[coord] for coord in self.selection])
-            data = self.data[rows]
+            data = self.data[self.block_data.rows(self.selection)]
         self.Outputs.selected_data.send(data)
 
 
@@ -1,6 +1,6 @@
 import sys
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import numpy as np
 from AnyQt.QtCore import Qt, QItemSelectionModel
@@ -11,6 +11,8 @@ from Orange.data import DiscreteVariable, ContinuousVariable, Domain, \
 from Orange.widgets.tests.base import WidgetTest
 from orangewidget.tests.base import GuiTest
 from orangecontrib.timeseries import Timeseries
+from orangecontrib.timeseries.aggregate import AggOptions, moving_statistics, \
+    run_jobs
 
 from orangecontrib.timeseries.widgets.owmovingtransform import \
     OWMovingTransform, TransformationsModel, NumericFilterProxy
@@ -381,6 +383,153 @@ class TestOWMovingTransform(WidgetTest):
              [1.0, 3.0, 13.25, -1.0],
              [1.0, 3.5, 16.75, -2.0]])
 
+    def test_compute_sliding_window_fused(self):
+        widget = self.widget
+        widget.commit.now = Mock()
+        widget.var_hints = {("c1", True): {"mean", "std", "max", "median"},
+                            ("c2", True): {"mean", "std", "max"},
+                            ("d2", False): {"defined"}}
+        widget.method = widget.SlidingWindow
+        widget.window_width = 3
+        widget.keep_instances = widget.DiscardOriginal
+        widget.n_jobs = 1
+        self.send_signal(widget.Inputs.time_series, self.data)
+
+        with patch("orangecontrib.timeseries.widgets.owmovingtransform."
+                   "moving_statistics", wraps=moving_statistics) as fused:
+            data = widget._compute_sliding_window()
+        fused.assert_called_once()
+        self.assertEqual(fused.call_args[0][0].shape, (6, 2))
+
+        self.assertEqual(
+            [attr.name for attr in data.domain.attributes],
+            ['c1 (mean)', 'c1 (max)', 'c1 (median)', 'c1 (std)',
+             'c2 (mean)', 'c2 (max)', 'c2 (std)', 'd2 (defined)'])
+        for attr in data.domain.attributes:
+            name, trans = attr.name[:-1].split(" (")
+            np.testing.assert_equal(
+                data.get_column(attr),
+                AggOptions[trans].transform(self.data.get_column(name), 3, 1))
+
+    def test_compute_multi_width(self):
+        widget = self.widget
+        widget.commit.now = Mock()
+        widget.var_hints = {("c1", True): {"mean", "max", "median"},
+                            ("c2", True): {"mean", "cumsum"}}
+        widget.method = widget.SlidingWindow
+        widget.window_width = 3
+        widget.extra_widths = "2, 0,, 3"
+        self.assertEqual(widget._window_widths(), [2, 3])
+        self.send_signal(widget.Inputs.time_series, self.data)
+
+        specs = [(width, var, trans)
+                 for width in (2, 3)
+                 for var, trans in (("c1", "mean"), ("c1", "max"),
+                                    ("c1", "median"), ("c2", "mean"),
+                                    ("c2", "cumsum"))]
+        for widget.keep_instances in (widget.DiscardOriginal,
+                                      widget.KeepComplete, widget.KeepAll):
+            data = widget._compute_multi_width([2, 3])
+            names = [f"{var} ({trans}, {width})"
+                     for width, var, trans in specs]
+            keep_all = widget.keep_instances == widget.KeepAll
+            if widget.keep_instances != widget.DiscardOriginal:
+                names = ["d1", "c1", "c2"] + names
+                np.testing.assert_equal(
+                    data.X[:, :3], self.data.X[0 if keep_all else 2:])
+            self.assertEqual(
+                [attr.name for attr in data.domain.attributes], names)
+            for attr, (width, name, trans) in \
+                    zip(data.domain.attributes[-10:], specs):
+                agg = AggOptions[trans]
+                column = self.data.get_column(name)
+                if keep_all and agg.cumulative:
+                    expected = agg.cumulative(column)
+                else:
+                    expected = agg.transform(column, width, 1)
+                    if keep_all:
+                        expected = np.hstack(([np.nan] * (width - 1),
+                                              expected))
+                    else:
+                        expected = expected[3 - width:]
+                np.testing.assert_almost_equal(data.get_column(attr),
+                                               expected)
+
+        widget.extra_widths = "20"
+        widget.keep_instances = widget.KeepComplete
+        data = widget._compute_sliding_window()
+        self.assertTrue(widget.Warning.window_to_large.is_shown())
+        self.assertEqual(len(data), 0)
+
+    def test_compute_parallel(self):
+        widget = self.widget
+        widget.commit.now = Mock()
+        widget.var_hints = {("c1", True): {"mean", "std", "median", "sum"},
+                            ("c2", True): {"mean", "std", "max", "sum"},
+                            ("d2", False): {"defined", "mode"}}
+        widget.window_width = widget.block_width = 2
+        widget.period_width = "Days"
+        self.send_signal(widget.Inputs.time_series, self.time_data)
+        for widget.method, compute in enumerate(
+                (widget._compute_sliding_window,
+                 widget._compute_sequential_blocks,
+                 widget._compute_period_aggregation,
+                 widget._compute_time_window)):
+            widget.n_jobs = 1
+            expected = compute()
+            widget.n_jobs = 3
+            widget._sliding_state = None
+            data = compute()
+            self.assertEqual(data.domain, expected.domain)
+            np.testing.assert_equal(data.X, expected.X)
+
+    def test_n_jobs(self):
+        widget = self.widget
+        self.assertEqual(widget.n_jobs, 0)
+        self.assertEqual(widget.controls.n_jobs.specialValueText(), "Auto")
+        widget.var_hints = {("c1", True): {"median"}}
+        self.send_signal(widget.Inputs.time_series, self.data)
+        with patch("orangecontrib.timeseries.widgets.owmovingtransform."
+                   "run_jobs", wraps=run_jobs) as jobs:
+            widget.controls.n_jobs.setValue(1)
+            widget._sliding_state = None
+            widget.commit.now()
+        self.assertEqual(widget.n_jobs, 1)
+        self.assertEqual(jobs.call_args[0][1], 1)
+
+    def test_compute_sliding_window_appended(self):
+        widget = self.widget
+        widget.commit.now = Mock()
+        widget.var_hints = {("c1", True): {"mean", "median", "cumsum"},
+                            ("c2", True): {"EWMA", "max"},
+                            ("d2", False): {"mode"}}
+        widget.method = widget.SlidingWindow
+        widget.window_width = 3
+        append = widget._append_sliding_window
+
+        for widget.keep_instances in (widget.DiscardOriginal,
+                                      widget.KeepComplete, widget.KeepAll):
+            self.send_signal(widget.Inputs.time_series, self.data)
+            expected = widget._compute_sliding_window()
+
+            with patch.object(widget, "_append_sliding_window",
+                              wraps=append) as appended:
+                for n in (1, 2, 4, 4, 6):
+                    self.send_signal(widget.Inputs.time_series, self.data[:n])
+                    data = widget._compute_sliding_window()
+                self.assertEqual(appended.call_count, 4)
+            np.testing.assert_almost_equal(data.X, expected.X)
+            np.testing.assert_equal(data.Y, expected.Y)
+
+        # Changed data is recomputed from scratch
+        data = self.data.copy()
+        with data.unlocked():
+            data.X[0, 1] = 42
+        with patch.object(widget, "_append_sliding_window") as appended:
+            self.send_signal(widget.Inputs.time_series, data)
+            widget._compute_sliding_window()
+            appended.assert_not_called()
+
     def test_compute_sliding_window_warnings(self):
         widget = self.widget
         widget.commit.now = Mock()
@@ -634,6 +783,41 @@ class TestOWMovingTransform(WidgetTest):
         self.send_signal(widget.Inputs.time_series, data)
         self.assertFalse(widget.Warning.inapplicable_aggregations.is_shown())
 
+    def test_compute_time_window(self):
+        widget = self.widget
+        widget.commit.now = Mock()
+        widget.var_hints = {("c2", True): {"sum", "max", "lin. MA"}}
+        widget.method = widget.TimeWindow
+        widget.time_window_width = 1
+
+        self.send_signal(widget.Inputs.time_series, self.time_data)
+        data = widget._compute_time_window()
+        self.assertEqual([attr.name for attr in data.domain.attributes],
+                         ['d1', 'c1', 'c2', 'c2 (sum)', 'c2 (max)'])
+        self.assertIs(data.domain.class_var, self.data.domain.class_var)
+        np.testing.assert_equal(data.X[:, :3], self.time_data.X)
+        # Times are 1, 2, 2.5, 2.75, 3, 3.5; windows are (t - 1, t]
+        np.testing.assert_equal(data.X[:, 3], [2.5, 0, 0, 1, 0, -2])
+        np.testing.assert_equal(data.X[:, 4], [2.5, 0, 0, 1, 1, 1])
+        np.testing.assert_equal(data.Y, self.time_data.Y)
+        self.assertTrue(widget.Warning.inapplicable_aggregations.is_shown())
+
+        widget.time_window_width = 2
+        data = widget._compute_time_window()
+        np.testing.assert_equal(data.X[:, 3], [2.5, 2.5, 2.5, 3.5, 0, -2])
+
+        # windows with negative values give nan instead of raising errors
+        widget.var_hints = {("c2", True): {"harmonic", "geometric"}}
+        self.send_signal(widget.Inputs.time_series, self.time_data)
+        data = widget._compute_time_window()
+        np.testing.assert_almost_equal(
+            data.X[:, 3:], [[2.5, 2.5], [0, 0]] + [[np.nan] * 2] * 4)
+
+        widget.var_hints = {}
+        self.send_signal(widget.Inputs.time_series, self.time_data)
+        self.assertIsNone(widget._compute_time_window())
+        self.assertTrue(widget.Warning.no_aggregations.is_shown())
+
     def test_report(self):
         widget = self.widget
         widget.commit.now = Mock()
@@ -645,7 +829,8 @@ class TestOWMovingTransform(WidgetTest):
         self.send_signal(widget.Inputs.time_series, self.data)
         for widget.method in (widget.SlidingWindow,
                               widget.SequentialBlocks,
-                              widget.TimePeriods):
+                              widget.TimePeriods,
+                              widget.TimeWindow):
             widget.send_report()
 
     def test_migrated_aggregate_settings(self):
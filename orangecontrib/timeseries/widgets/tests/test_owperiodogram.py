@@ -1,8 +1,12 @@
 import unittest
+from unittest.mock import patch
 
+import numpy as np
+
+from Orange.data import Domain, ContinuousVariable
 from Orange.widgets.tests.base import WidgetTest
 
-from orangecontrib.timeseries import Timeseries
+from orangecontrib.timeseries import Timeseries, periodogram_welch
 from orangecontrib.timeseries.widgets.owperiodogram import OWPeriodogram
 
 # There are not many tests here.
@@ -25,6 +29,53 @@ class TestPeriodogramWidget(WidgetTest):
         ts = Timeseries.from_file("iris")
         self.send_signal(self.widget.Inputs.time_series, ts)
 
+    def test_batch(self):
+        ts = Timeseries.from_file("iris")
+        self.send_signal(self.widget.Inputs.time_series, ts)
+        attrs = [var.name for var in ts.domain.attributes]
+        self.widget._cached.clear()
+        with patch("orangecontrib.timeseries.widgets.owperiodogram."
+                   "periodogram_welch", wraps=periodogram_welch) as welch:
+            self.widget.selection = attrs
+            self.widget.replot()
+            welch.assert_called_once()
+            self.assertEqual(welch.call_args[0][0].shape, (len(ts), 4))
+            self.assertEqual(list(self.widget._cached), attrs)
+
+    def test_segments(self):
+        widget = self.widget
+        x = np.sin(2 * np.pi * np.arange(2000) / 300)
+        ts = Timeseries.from_numpy(
+            Domain([ContinuousVariable("x")]), x[:, None])
+        self.send_signal(widget.Inputs.time_series, ts)
+        widget.selection = ["x"]
+
+        self.assertEqual(widget.segment_length(1999), (1999, 999))
+        widget.replot()
+        periods, pgram = widget._cached["x"]
+        self.assertAlmostEqual(periods[pgram == 1][0], 300, delta=5)
+
+        widget.controls.segments.setValue(3)
+        widget.controls.overlap.setValue(0)
+        self.assertEqual(widget.segment_length(1999), (666, 0))
+        periods, pgram = widget._cached["x"]
+        self.assertAlmostEqual(periods[pgram == 1][0], 300, delta=15)
+
+        widget.controls.overlap.setValue(50)
+        self.assertEqual(widget.segment_length(1999), (999, 499))
+
+    def test_short_series(self):
+        widget = self.widget
+        domain = Domain([ContinuousVariable("x")])
+        for n in (2, 3):
+            ts = Timeseries.from_numpy(
+                domain, np.arange(n, dtype=float)[:, None] ** 2)
+            self.send_signal(widget.Inputs.time_series, ts)
+            widget.selection = ["x"]
+            widget.replot()
+            self.assertIn("x", widget._cached)
+            self.assertLessEqual(widget.segment_length(n - 1)[0], n - 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,7 +5,7 @@ from unittest.mock import Mock
 import numpy as np
 
 from AnyQt.QtGui import QColor
-from AnyQt.QtCore import Qt
+from AnyQt.QtCore import Qt, QItemSelectionModel
 from AnyQt.QtWidgets import QApplication
 
 from orangewidget.tests.base import GuiTest
@@ -502,6 +502,22 @@ class TestOWSpiralogram(WidgetTest):
         self.assertEqual(
             {k: list(v) for k, v in blocks.indices.items()}, indices)
 
+    def test_commit_selection(self):
+        widget = self.widget
+        self.send_signal(widget.Inputs.time_series, self.time_data)
+        a, b, *_ = self.data.domain.attributes
+        self.change_x(widget.x_model.indexOf(b))
+        self.change_r(0)
+        widget.recompute()
+
+        widget.select({(2, 0), (0, 0)}, QItemSelectionModel.Select)
+        out = self.get_output(widget.Outputs.selected_data)
+        np.testing.assert_equal(out.ids,
+                                self.time_data.ids[[0, 1, 2, 4, 3, 6, 9]])
+
+        widget.select(set(), QItemSelectionModel.ClearAndSelect)
+        self.assertIsNone(self.get_output(widget.Outputs.selected_data))
+
     def test_compute_data(self):
         widget = self.widget
         self.send_signal(widget.Inputs.time_series, self.time_data)
@@ -510,10 +526,9 @@ class TestOWSpiralogram(WidgetTest):
         c.number_of_decimals = 8
 
         columns = [np.repeat(np.arange(3), 5), np.array(list(range(5)) * 3)]
-        indices = {(x, r): np.array([]) for x in range(3) for r in range(5)}
-        indices[(0, 0)] = np.arange(6)
-        indices[(2, 1)] = np.arange(6, 10)
-        widget.block_data = BlockData([a, b], columns, indices)
+        # rows 0-5 are in block (0, 0), and 6-9 in (2, 1)
+        offsets = np.array([0] + [6] * 11 + [10] * 4)
+        widget.block_data = BlockData([a, b], columns, np.arange(10), offsets)
 
         counts = np.zeros(len(columns[0]))
         counts[0] = 6
@@ -79,6 +79,7 @@ if __name__ == '__main__':
         extras_require={
             'test': ['coverage'],
             'doc': ['sphinx', 'recommonmark', 'sphinx_rtd_theme'],
+            'numba': ['numba'],
         },
         entry_points=ENTRY_POINTS,
         test_suite='orangecontrib.timeseries.tests.suite',